@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Materializa data/processed/**/*.parquet em um banco DuckDB nativo (data/processed.duckdb).
+
+Os Parquets continuam sendo o arquivo frio (fonte de verdade analítica); o .duckdb é
+uma cópia para consulta rápida, uma tabela por sistema (sia, sih). A atualização é
+incremental por partição (ano, uf): só partições cujo conjunto de arquivos mudou
+(quantidade, bytes ou mtime) são apagadas e reinseridas.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+import duckdb
+
+
+ROOT = Path(__file__).resolve().parent.parent
+PROCESSED = ROOT / "data" / "processed"
+NATIVE_DB = ROOT / "data" / "processed.duckdb"
+
+SYSTEM_TABLES = {"SIA": "sia", "SIH": "sih"}
+STATE_TABLE = "_partitions"
+
+
+def _sql_str(v: str) -> str:
+    return v.replace("'", "''")
+
+
+def scan_partitions() -> dict[tuple[str, str, str], tuple[int, int, int]]:
+    """(sistema, ano, uf) -> (n_arquivos, bytes, maior mtime_ns) a partir dos diretórios hive."""
+    parts: dict[tuple[str, str, str], tuple[int, int, int]] = {}
+    for ano_dir in sorted(PROCESSED.glob("ano=*")):
+        for uf_dir in sorted(ano_dir.glob("uf=*")):
+            for sis_dir in sorted(uf_dir.glob("sistema=*")):
+                sistema = sis_dir.name.split("=", 1)[1].upper()
+                if sistema not in SYSTEM_TABLES:
+                    continue
+                n = size = mtime = 0
+                for f in sis_dir.glob("*.parquet"):
+                    st = f.stat()
+                    n += 1
+                    size += st.st_size
+                    mtime = max(mtime, st.st_mtime_ns)
+                if n:
+                    key = (sistema, ano_dir.name.split("=", 1)[1], uf_dir.name.split("=", 1)[1])
+                    parts[key] = (n, size, mtime)
+    return parts
+
+
+def _partition_glob(sistema: str, ano: str, uf: str) -> str:
+    return _sql_str(str(PROCESSED / f"ano={ano}" / f"uf={uf}" / f"sistema={sistema}" / "*.parquet"))
+
+
+def _partition_source(sistema: str, ano: str, uf: str) -> str:
+    return (
+        f"SELECT * FROM read_parquet('{_partition_glob(sistema, ano, uf)}', "
+        "hive_partitioning=true, union_by_name=true)"
+    )
+
+
+def _table_exists(con: duckdb.DuckDBPyConnection, name: str) -> bool:
+    return con.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?", [name]
+    ).fetchone()[0] > 0
+
+
+def _quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _add_missing_columns(con: duckdb.DuckDBPyConnection, table: str, src: str) -> None:
+    """
+    ALTER TABLE ... ADD COLUMN para as colunas de `src` que a tabela ainda não tem: o layout DATASUS
+    muda entre anos e a tabela nasce só com as colunas da primeira partição carregada.
+    """
+    have = {row[0].lower() for row in con.execute(f"DESCRIBE {table}").fetchall()}
+    for name, col_type, *_ in con.execute(f"DESCRIBE {src}").fetchall():
+        if name.lower() not in have:
+            con.execute(f"ALTER TABLE {table} ADD COLUMN {_quote_ident(name)} {col_type}")
+            have.add(name.lower())
+
+
+def build_native(db_path: Path = NATIVE_DB) -> tuple[int, int]:
+    """Atualiza o banco nativo. Retorna (partições recarregadas, partições removidas)."""
+    current = scan_partitions()
+    con = duckdb.connect(str(db_path))
+    try:
+        con.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+              sistema VARCHAR, ano VARCHAR, uf VARCHAR,
+              n_files BIGINT, n_bytes BIGINT, max_mtime_ns BIGINT
+            )
+            """
+        )
+        stored = {
+            (s, a, u): (n, b, m)
+            for s, a, u, n, b, m in con.execute(f"SELECT * FROM {STATE_TABLE}").fetchall()
+        }
+        changed = [k for k, sig in current.items() if stored.get(k) != sig]
+        removed = [k for k in stored if k not in current]
+
+        # Colunas novas em tabelas existentes antes da transação: no DuckDB, ALTER TABLE depois de
+        # DELETE na mesma transação falha no COMMIT (coluna nula a mais é inofensiva se a carga falhar)
+        for sistema, ano, uf in changed:
+            table = SYSTEM_TABLES[sistema]
+            if _table_exists(con, table):
+                _add_missing_columns(con, table, _partition_source(sistema, ano, uf))
+
+        con.execute("BEGIN TRANSACTION")
+        for sistema, ano, uf in removed + changed:
+            table = SYSTEM_TABLES[sistema]
+            if _table_exists(con, table):
+                con.execute(
+                    f"DELETE FROM {table} WHERE CAST(ano AS VARCHAR) = ? AND CAST(uf AS VARCHAR) = ?",
+                    [ano, uf],
+                )
+            con.execute(
+                f"DELETE FROM {STATE_TABLE} WHERE sistema = ? AND ano = ? AND uf = ?",
+                [sistema, ano, uf],
+            )
+        for sistema, ano, uf in changed:
+            table = SYSTEM_TABLES[sistema]
+            src = _partition_source(sistema, ano, uf)
+            if _table_exists(con, table):
+                _add_missing_columns(con, table, src)  # tabela criada nesta carga por outra partição
+                con.execute(f"INSERT INTO {table} BY NAME {src}")
+            else:
+                con.execute(f"CREATE TABLE {table} AS {src}")
+            con.execute(
+                f"INSERT INTO {STATE_TABLE} VALUES (?, ?, ?, ?, ?, ?)",
+                [sistema, ano, uf, *current[(sistema, ano, uf)]],
+            )
+        con.execute("COMMIT")
+        if changed or removed:
+            con.execute("CHECKPOINT")
+    finally:
+        con.close()
+    return len(changed), len(removed)
+
+
+def main() -> None:
+    if not PROCESSED.exists():
+        raise SystemExit(f"Diretório não encontrado: {PROCESSED}")
+    changed, removed = build_native()
+    print(f"Atualizado: {NATIVE_DB} ({changed} partição(ões) recarregada(s), {removed} removida(s))")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,233 +1,558 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+import functools
+import io
+import os
 from pathlib import Path
-import re
 
 import duckdb
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.fs as pafs
 import pyarrow.parquet as pq
 
 
 ROOT = Path(__file__).resolve().parent.parent
 PROCESSED = ROOT / "data" / "processed"
+STATS_CACHE_DB = ROOT / "data" / ".stats_cache.duckdb"  # catálogo persistente de contagens por arquivo
+NATIVE_DB = ROOT / "data" / "processed.duckdb"  # gerado por scripts/build_native.py
 DOC_OUT = ROOT / "docs" / "06.2-estatisticas-base-processada.md"
 
+GIB = 1024**3
 
-PART_RE = re.compile(r"ano=(\d{4})/uf=([A-Z]{2})/sistema=(SIA|SIH)/", re.IGNORECASE)
 
+# Colunas lidas por run_sql em cada sistema (projeção na leitura dos Parquets).
+_DS_COMMON = ["main_icd", "custo_total", "idade_grupo", "ano_mes", "icd_group", "ano_cmpt", "mes_cmpt", "sistema"]
+DS_COLUMNS = {
+    "SIA": _DS_COMMON + ["pa_proc_id"],
+    "SIH": _DS_COMMON + ["proc_rea"],
+}
 
+
+def parse_partition(path: str) -> tuple[str, str, str] | None:
+    """
+    Extrai (ano, uf, sistema) dos três diretórios pais do arquivo:
+    `.../ano=YYYY/uf=XX/sistema=SIA|SIH/arquivo.parquet` (layout gravado pela ingestão).
+    Retorna None se o caminho não seguir o layout.
+    """
+    parts = path.rsplit("/", 4)
+    if len(parts) != 5:
+        return None
+    _, ano_dir, uf_dir, sis_dir, _ = parts
+    if not (ano_dir.startswith("ano=") and uf_dir.startswith("uf=") and sis_dir.startswith("sistema=")):
+        return None
+    ano, uf, sistema = ano_dir[4:], uf_dir[3:], sis_dir[8:].upper()
+    if not (
+        len(ano) == 4 and ano.isdigit() and ano.isascii()
+        and len(uf) == 2 and uf.isalpha() and uf.isascii()
+        and sistema in ("SIA", "SIH")
+    ):
+        return None
+    return ano, uf, sistema
+
+
+# Separadores pt-BR: milhar "." e decimal "," (troca simultânea, sem passo intermediário)
+_INT_SWAP = str.maketrans({",": "."})
+_FLOAT_SWAP = str.maketrans({",": ".", ".": ","})
+
+
+@functools.lru_cache(maxsize=4096)
 def fmt_int(v: int) -> str:
-    return f"{v:,}".replace(",", ".")
+    return f"{v:,}".translate(_INT_SWAP)
 
 
+@functools.lru_cache(maxsize=4096)
 def fmt_float(v: float | None, nd: int = 2) -> str:
     if v is None:
         return "-"
-    return f"{v:,.{nd}f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    return f"{v:,.{nd}f}".translate(_FLOAT_SWAP)
+
+
+def _sql_str(v: str) -> str:
+    return v.replace("'", "''")
+
+
+def _read_rows(path: str) -> int:
+    try:
+        return pq.ParquetFile(path).metadata.num_rows
+    except Exception:
+        return 0
+
+
+def connect(database: str | Path = ":memory:") -> duckdb.DuckDBPyConnection:
+    """
+    Conexão configurada para muitos Parquets pequenos: todas as CPUs, cache de
+    metadados Parquet entre consultas (object cache) e sem preservar ordem de inserção
+    (toda ordem relevante é explícita no SQL). DUCKDB_MEMORY_LIMIT (ex.: "8GB") limita a memória.
+    """
+    con = duckdb.connect(database=str(database))
+    con.execute(f"SET threads = {os.cpu_count() or 1}")
+    con.execute("SET enable_object_cache = true")
+    con.execute("SET preserve_insertion_order = false")
+    memory_limit = os.environ.get("DUCKDB_MEMORY_LIMIT")
+    if memory_limit:
+        con.execute(f"SET memory_limit = '{_sql_str(memory_limit)}'")
+    return con
+
+
+def _fetch_columns(con: duckdb.DuckDBPyConnection, sql: str) -> list[list]:
+    """Executa `sql` e devolve o resultado por coluna, via Arrow (sem uma tupla Python por linha)."""
+    result = con.execute(sql).arrow()
+    if isinstance(result, pa.RecordBatchReader):  # DuckDB >= 1.4 devolve um reader
+        result = result.read_all()
+    return [col.to_pylist() for col in result.columns]
+
+
+def read_row_counts(con: duckdb.DuckDBPyConnection, files: list[str]) -> dict[str, int]:
+    """
+    Linhas por arquivo (apenas `files`) via footers Parquet, lidos em uma única varredura do DuckDB.
+    Se algum footer estiver corrompido a varredura inteira falha; nesse caso lê os
+    footers arquivo a arquivo em threads (pyarrow libera o GIL), contando 0 para os ilegíveis.
+    """
+    file_list = ", ".join(f"'{_sql_str(f)}'" for f in files)
+    try:
+        names, counts = _fetch_columns(
+            con, f"SELECT file_name, num_rows FROM parquet_file_metadata([{file_list}])"
+        )
+        return {_posix(name): int(n or 0) for name, n in zip(names, counts)}
+    except duckdb.Error:
+        workers = min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            return dict(zip(files, ex.map(_read_rows, files)))
+
+
+def _posix(path: str) -> str:
+    return path.replace("\\", "/") if os.sep != "/" else path
+
+
+def _list_parquet(dir_path: Path) -> list[tuple[str, int, int]]:
+    """
+    (caminho POSIX, tamanho, mtime_ns) de cada .parquet sob dir_path, ordenado.
+    Listagem recursiva em uma única chamada C++ (pyarrow.fs), com tamanho e mtime já no FileInfo.
+    """
+    infos = pafs.LocalFileSystem().get_file_info(pafs.FileSelector(str(dir_path), recursive=True))
+    return sorted(
+        (_posix(i.path), i.size, i.mtime_ns)
+        for i in infos
+        if i.type == pafs.FileType.File and i.base_name.endswith(".parquet")
+    )
+
+
+def row_counts_cached(entries: list[tuple[str, int, int]]) -> dict[str, int]:
+    """
+    Linhas por arquivo com catálogo persistente em data/.stats_cache.duckdb
+    (tabela file_row_counts). Parquets processados não são reescritos no lugar: só lê o
+    footer de arquivos novos ou com (mtime, tamanho) diferente do registrado.
+    """
+    listing = pa.table({
+        "path": pa.array([path for path, _, _ in entries], pa.string()),
+        "size": pa.array([size for _, size, _ in entries], pa.int64()),
+        "mtime_ns": pa.array([mtime_ns for _, _, mtime_ns in entries], pa.int64()),
+    })
+    con = connect(STATS_CACHE_DB)
+    try:
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS file_row_counts (
+              path VARCHAR PRIMARY KEY, mtime_ns BIGINT, size BIGINT, num_rows BIGINT
+            )
+            """
+        )
+        con.register("listing", listing)
+        (missing,) = _fetch_columns(
+            con,
+            """
+            SELECT l.path
+            FROM listing l
+            LEFT JOIN file_row_counts c
+              ON c.path = l.path AND c.mtime_ns = l.mtime_ns AND c.size = l.size
+            WHERE c.path IS NULL
+            """,
+        )
+        if missing:
+            fresh = read_row_counts(con, missing)
+            con.register("fresh", pa.table({
+                "path": pa.array(missing, pa.string()),
+                "num_rows": pa.array([fresh.get(path, 0) for path in missing], pa.int64()),
+            }))
+            con.execute(
+                """
+                INSERT OR REPLACE INTO file_row_counts
+                SELECT l.path, l.mtime_ns, l.size, f.num_rows
+                FROM listing l JOIN fresh f USING (path)
+                """
+            )
+        con.execute("DELETE FROM file_row_counts WHERE path NOT IN (SELECT path FROM listing)")
+        paths, rows = _fetch_columns(
+            con, "SELECT path, num_rows FROM file_row_counts WHERE path IN (SELECT path FROM listing)"
+        )
+    finally:
+        con.close()
+    return dict(zip(paths, rows))
+
+
+def _group_totals(table: pa.Table, key: str) -> dict[str, dict[str, int]]:
+    """{chave: {"files", "rows", "bytes"}} agregado no Arrow (group_by) em vez de loop Python."""
+    g = table.group_by(key).aggregate([("rows", "count"), ("rows", "sum"), ("bytes", "sum")]).to_pydict()
+    return {
+        k: {"files": n, "rows": r, "bytes": b}
+        for k, n, r, b in zip(g[key], g["rows_count"], g["rows_sum"], g["bytes_sum"])
+    }
 
 
 def collect_file_stats() -> dict:
-    files = sorted(PROCESSED.rglob("*.parquet"))
-    total_size = 0
-    total_rows = 0
-    by_system = defaultdict(lambda: {"files": 0, "rows": 0, "bytes": 0})
-    by_year = defaultdict(lambda: {"files": 0, "rows": 0, "bytes": 0})
-    by_uf = defaultdict(lambda: {"files": 0, "rows": 0, "bytes": 0})
-
-    for f in files:
-        st = f.stat()
-        total_size += st.st_size
-        m = PART_RE.search(f.as_posix())
-        if not m:
+    entries = _list_parquet(PROCESSED)
+    files = [path for path, _, _ in entries]
+    row_counts = row_counts_cached(entries)
+    total_size = sum(size for _, size, _ in entries)
+
+    sistemas: list[str] = []
+    anos: list[str] = []
+    ufs: list[str] = []
+    rows: list[int] = []
+    sizes: list[int] = []
+    for f, size, _ in entries:
+        part = parse_partition(f)
+        if part is None:
             continue
-        ano, uf, sistema = m.group(1), m.group(2), m.group(3).upper()
-        try:
-            rows = pq.ParquetFile(f).metadata.num_rows
-        except Exception:
-            rows = 0
-        total_rows += rows
-        by_system[sistema]["files"] += 1
-        by_system[sistema]["rows"] += rows
-        by_system[sistema]["bytes"] += st.st_size
-        by_year[ano]["files"] += 1
-        by_year[ano]["rows"] += rows
-        by_year[ano]["bytes"] += st.st_size
-        by_uf[uf]["files"] += 1
-        by_uf[uf]["rows"] += rows
-        by_uf[uf]["bytes"] += st.st_size
+        ano, uf, sistema = part
+        sistemas.append(sistema)
+        anos.append(ano)
+        ufs.append(uf)
+        rows.append(row_counts.get(f, 0))
+        sizes.append(size)
+    table = pa.table({
+        "sistema": pa.array(sistemas, pa.string()),
+        "ano": pa.array(anos, pa.string()),
+        "uf": pa.array(ufs, pa.string()),
+        "rows": pa.array(rows, pa.int64()),
+        "bytes": pa.array(sizes, pa.int64()),
+    })
+    total_rows = pc.sum(table["rows"]).as_py() or 0
 
     return {
         "files": files,
         "total_files": len(files),
         "total_rows": total_rows,
         "total_size": total_size,
-        "by_system": by_system,
-        "by_year": by_year,
-        "by_uf": by_uf,
+        "by_system": _group_totals(table, "sistema"),
+        "by_year": _group_totals(table, "ano"),
+        "by_uf": _group_totals(table, "uf"),
     }
 
 
-def run_sql():
-    con = duckdb.connect(database=":memory:")
-    glob = str(PROCESSED / "**" / "*.parquet").replace("'", "''")
+NATIVE_SOURCE = "`data/processed.duckdb` (tabelas nativas)"
+PARQUET_SOURCE = "`data/processed/**/*.parquet`"
+
+
+# Normalização de tipos feita uma única vez na view `ds`; as consultas usam as colunas prontas.
+DS_NORMALIZED = """
+  NULLIF(trim(CAST(main_icd AS VARCHAR)), '') AS main_icd,
+  custo_total,
+  NULLIF(trim(CAST(idade_grupo AS VARCHAR)), '') AS idade_grupo,
+  ano_mes,
+  CAST(icd_group AS VARCHAR) AS icd_group,
+  COALESCE(NULLIF(trim(CAST(pa_proc_id AS VARCHAR)), ''), NULLIF(trim(CAST(proc_rea AS VARCHAR)), '')) AS proc_id,
+  sistema,
+  CAST(TRY_CAST(ano_cmpt AS DOUBLE) AS BIGINT) AS ano_cmpt,
+  CAST(TRY_CAST(mes_cmpt AS DOUBLE) AS BIGINT) AS mes_cmpt
+"""
+
+
+def _projection(available: set[str]) -> str:
+    """Colunas de DS_COLUMNS presentes em `available`; as ausentes viram NULL (UNION ALL alinhado)."""
+    all_cols = dict.fromkeys(c for cols in DS_COLUMNS.values() for c in cols)
+    return ", ".join(c if c in available else f"NULL AS {c}" for c in all_cols)
+
+
+def _native_is_current(con: duckdb.DuckDBPyConnection) -> bool:
+    """
+    True se o estado gravado por build_native.py (tabela p._partitions) bate com as partições atuais
+    de data/processed: mesma assinatura (n_arquivos, bytes, maior mtime_ns) por (sistema, ano, uf).
+    """
+    current: dict[tuple[str, str, str], tuple[int, int, int]] = {}
+    for path, size, mtime_ns in _list_parquet(PROCESSED):
+        part = parse_partition(path)
+        if part is None:
+            continue
+        ano, uf, sistema = part
+        n, n_bytes, max_mtime = current.get((sistema, ano, uf), (0, 0, 0))
+        current[(sistema, ano, uf)] = (n + 1, n_bytes + size, max(max_mtime, mtime_ns))
+    try:
+        rows = con.execute(
+            "SELECT sistema, ano, uf, n_files, n_bytes, max_mtime_ns FROM p._partitions"
+        ).fetchall()
+    except duckdb.Error:
+        return False  # banco sem estado de partições: não há como saber se está em dia
+    return {(s, a, u): (n, b, m) for s, a, u, n, b, m in rows} == current
+
+
+def _create_ds_view(con: duckdb.DuckDBPyConnection) -> str:
+    """
+    Cria a view `ds` (colunas de DS_NORMALIZED). Usa o banco nativo (data/processed.duckdb)
+    quando existir e estiver em dia com data/processed; senão, lê os Parquets diretamente.
+    Retorna a descrição da fonte usada.
+    """
+    selects = []
+    source = PARQUET_SOURCE
+    if NATIVE_DB.is_file():
+        con.execute(f"ATTACH '{_sql_str(str(NATIVE_DB))}' AS p (READ_ONLY)")
+        if _native_is_current(con):
+            table_cols: dict[str, set[str]] = {}
+            for table, col in zip(*_fetch_columns(
+                con,
+                "SELECT table_name, column_name FROM duckdb_columns() "
+                "WHERE database_name = 'p' AND table_name IN ('sia', 'sih')",
+            )):
+                table_cols.setdefault(table, set()).add(col)
+            for table, cols in sorted(table_cols.items()):
+                selects.append(f"SELECT {_projection(cols)} FROM p.{table}")
+            if selects:
+                source = NATIVE_SOURCE
+        else:
+            # Partições transformadas depois do último build_native.py: o relatório misturaria
+            # contagens atuais (footers) com agregações defasadas; lê os Parquets
+            con.execute("DETACH p")
+    if not selects:
+        # Uma leitura por sistema, projetando só as colunas usadas. union_by_name: os arquivos de um
+        # mesmo sistema não têm schema garantidamente igual (arquivo vazio, tipos que variam entre
+        # arquivos); sem ele o DuckDB usa o schema do primeiro arquivo e converte (ou falha) o resto.
+        for sistema, cols in DS_COLUMNS.items():
+            part_dir = f"sistema={sistema}"
+            if next(PROCESSED.glob(f"ano=*/uf=*/{part_dir}/*.parquet"), None) is None:
+                continue
+            glob = _sql_str(str(PROCESSED / "**" / part_dir / "*.parquet"))
+            selects.append(
+                f"SELECT {_projection(set(cols))} FROM read_parquet('{glob}', hive_partitioning=true, union_by_name=true)"
+            )
+    if not selects:
+        raise SystemExit(f"Nenhum .parquet em {PROCESSED}")
     con.execute(
         f"""
         CREATE VIEW ds AS
-        SELECT * FROM read_parquet('{glob}', hive_partitioning=true, union_by_name=true);
+        SELECT {DS_NORMALIZED}
+        FROM ({" UNION ALL ".join(selects)})
         """
     )
+    return source
 
-    nulls = con.execute(
-        """
-        SELECT
-          COUNT(*) AS n_rows,
-          SUM(CASE WHEN main_icd IS NULL OR trim(CAST(main_icd AS VARCHAR)) = '' THEN 1 ELSE 0 END) AS n_main_icd_null,
-          SUM(CASE WHEN custo_total IS NULL THEN 1 ELSE 0 END) AS n_custo_total_null,
-          SUM(CASE WHEN idade_grupo IS NULL OR trim(CAST(idade_grupo AS VARCHAR)) = '' THEN 1 ELSE 0 END) AS n_idade_grupo_null,
-          SUM(CASE WHEN ano_mes IS NULL THEN 1 ELSE 0 END) AS n_ano_mes_null
-        FROM ds
-        """
-    ).fetchone()
 
-    custo = con.execute(
-        """
+def _months_coverage(con: duckdb.DuckDBPyConnection, native: bool) -> list[tuple[str, int, int]]:
+    """
+    (sistema, ano_cmpt, meses distintos), com a mesma chave nos dois caminhos; anos sem nenhum
+    mes_cmpt válido não aparecem. Nos Parquets, o sistema vem da partição hive e (ano_cmpt, mes_cmpt)
+    das estatísticas min/max dos footers: arquivo com um único ano e um único mês contribui sem
+    ler páginas de dados; só arquivos sem estatística ou com mais de um ano/mês são lidos.
+    """
+    if native:
+        return list(zip(*_fetch_columns(
+            con,
+            """
+            SELECT sistema, ano_cmpt, COUNT(DISTINCT mes_cmpt) AS meses_distintos
+            FROM ds
+            WHERE ano_cmpt IS NOT NULL AND mes_cmpt IS NOT NULL
+            GROUP BY 1, 2
+            ORDER BY 1, 2
+            """,
+        )))
+
+    glob = _sql_str(str(PROCESSED / "**" / "*.parquet"))
+    stats = _fetch_columns(
+        con,
+        f"""
         SELECT
-          MIN(custo_total) AS min_v,
-          QUANTILE_CONT(custo_total, 0.5) AS p50_v,
-          QUANTILE_CONT(custo_total, 0.95) AS p95_v,
-          AVG(custo_total) AS avg_v,
-          MAX(custo_total) AS max_v
-        FROM ds
-        WHERE custo_total IS NOT NULL
-        """
-    ).fetchone()
+          file_name,
+          path_in_schema,
+          MIN(TRY_CAST(stats_min AS DOUBLE)) AS lo,
+          MAX(TRY_CAST(stats_max AS DOUBLE)) AS hi,
+          BOOL_AND(stats_min IS NOT NULL AND stats_max IS NOT NULL) AS has_stats
+        FROM parquet_metadata('{glob}')
+        WHERE path_in_schema IN ('ano_cmpt', 'mes_cmpt')
+        GROUP BY 1, 2
+        """,
+    )
 
-    top_icd = con.execute(
-        """
-        SELECT CAST(icd_group AS VARCHAR) AS icd_group, COUNT(*) AS n
-        FROM ds
-        WHERE icd_group IS NOT NULL AND trim(CAST(icd_group AS VARCHAR)) <> ''
-        GROUP BY 1
-        ORDER BY n DESC
-        LIMIT 10
-        """
-    ).fetchall()
+    # Valor único (min == max, com estatística) de ano_cmpt/mes_cmpt por arquivo; None se não houver
+    single: dict[str, dict[str, float | None]] = {}
+    for file_name, col, lo, hi, has_stats in zip(*stats):
+        single.setdefault(file_name, {})[col] = lo if has_stats and lo is not None and lo == hi else None
+
+    months: dict[tuple[str, int], set[int]] = {}
+    to_scan: list[str] = []
+    for file_name, cols in single.items():
+        part = parse_partition(_posix(file_name))
+        if part is None or "mes_cmpt" not in cols or "ano_cmpt" not in cols:
+            continue
+        ano, mes = cols["ano_cmpt"], cols["mes_cmpt"]
+        if ano is not None and mes is not None:
+            months.setdefault((part[2], int(ano)), set()).add(int(mes))
+        else:
+            to_scan.append(file_name)
+
+    if to_scan:
+        file_list = ", ".join(f"'{_sql_str(f)}'" for f in to_scan)
+        for file_name, ano, mes in zip(*_fetch_columns(
+            con,
+            f"""
+            SELECT DISTINCT
+              filename,
+              CAST(TRY_CAST(ano_cmpt AS DOUBLE) AS BIGINT),
+              CAST(TRY_CAST(mes_cmpt AS DOUBLE) AS BIGINT)
+            FROM read_parquet([{file_list}], filename=true, union_by_name=true)
+            WHERE TRY_CAST(ano_cmpt AS DOUBLE) IS NOT NULL AND TRY_CAST(mes_cmpt AS DOUBLE) IS NOT NULL
+            """,
+        )):
+            sistema = parse_partition(_posix(file_name))[2]
+            months.setdefault((sistema, ano), set()).add(mes)
 
-    top_proc = con.execute(
+    return [(sistema, ano, len(m)) for (sistema, ano), m in sorted(months.items())]
+
+
+def run_sql():
+    con = connect()
+    source = _create_ds_view(con)
+
+    # Uma única consulta: o scan de `ds` é compartilhado por todas as agregações.
+    # MIN/approx_quantile/AVG/MAX já ignoram NULL, então as estatísticas de custo_total
+    # saem da mesma agregação das contagens de nulos.
+    row = con.execute(
         """
-        SELECT proc_id, COUNT(*) AS n
-        FROM (
-          SELECT COALESCE(NULLIF(trim(CAST(pa_proc_id AS VARCHAR)), ''), NULLIF(trim(CAST(proc_rea AS VARCHAR)), '')) AS proc_id
+        WITH agg AS (
+          SELECT
+            COUNT(*) AS n_rows,
+            COUNT(*) - COUNT(main_icd) AS n_main_icd_null,
+            COUNT(*) - COUNT(custo_total) AS n_custo_total_null,
+            COUNT(*) - COUNT(idade_grupo) AS n_idade_grupo_null,
+            COUNT(*) - COUNT(ano_mes) AS n_ano_mes_null,
+            MIN(custo_total) AS min_v,
+            approx_quantile(custo_total, 0.5) AS p50_v,
+            approx_quantile(custo_total, 0.95) AS p95_v,
+            AVG(custo_total) AS avg_v,
+            MAX(custo_total) AS max_v
+          FROM ds
+        ),
+        top_icd AS (
+          SELECT icd_group, COUNT(*) AS n
           FROM ds
+          WHERE icd_group IS NOT NULL AND trim(icd_group) <> ''
+          GROUP BY 1
+          ORDER BY n DESC
+          LIMIT 10
+        ),
+        top_proc AS (
+          SELECT proc_id, COUNT(*) AS n
+          FROM ds
+          WHERE proc_id IS NOT NULL
+          GROUP BY 1
+          ORDER BY n DESC
+          LIMIT 10
         )
-        WHERE proc_id IS NOT NULL
-        GROUP BY 1
-        ORDER BY n DESC
-        LIMIT 10
-        """
-    ).fetchall()
-
-    months_cov = con.execute(
-        """
         SELECT
-          sistema,
-          CAST(TRY_CAST(ano_cmpt AS DOUBLE) AS BIGINT) AS ano_cmpt_norm,
-          COUNT(DISTINCT CAST(TRY_CAST(mes_cmpt AS DOUBLE) AS BIGINT)) AS meses_distintos
-        FROM ds
-        WHERE TRY_CAST(ano_cmpt AS DOUBLE) IS NOT NULL
-        GROUP BY 1, 2
-        ORDER BY 1, 2
+          agg.*,
+          (SELECT list(struct_pack(k := icd_group, n := n) ORDER BY n DESC) FROM top_icd) AS top_icd,
+          (SELECT list(struct_pack(k := proc_id, n := n) ORDER BY n DESC) FROM top_proc) AS top_proc
+        FROM agg
         """
-    ).fetchall()
+    ).fetchone()
+    months_cov = _months_coverage(con, native=source == NATIVE_SOURCE)
+    con.close()
 
     return {
-        "nulls": nulls,
-        "custo": custo,
-        "top_icd": top_icd,
-        "top_proc": top_proc,
+        "source": source,
+        "nulls": row[0:5],
+        "custo": row[5:10],
+        "top_icd": [(d["k"], d["n"]) for d in row[10] or []],
+        "top_proc": [(d["k"], d["n"]) for d in row[11] or []],
         "months_cov": months_cov,
     }
 
 
+def _table(header: str, align: str, rows) -> str:
+    """Tabela Markdown: cabeçalho, alinhamento e uma linha por item de `rows`."""
+    return "\n".join([header, align, *rows]) + "\n"
+
+
 def build_markdown(fs: dict, sql: dict) -> str:
     ts = datetime.now(timezone.utc).astimezone().strftime("%Y-%m-%d %H:%M:%S %Z")
     n_rows, n_main_icd_null, n_custo_total_null, n_idade_grupo_null, n_ano_mes_null = sql["nulls"]
-
-    lines: list[str] = []
-    lines.append("# 06.2 - Estatísticas da Base Processada")
-    lines.append("")
-    lines.append(f"Atualizado em: `{ts}`")
-    lines.append("")
-    lines.append("## 1. Volume Geral")
-    lines.append("")
-    lines.append(f"- Arquivos parquet: `{fmt_int(fs['total_files'])}`")
-    lines.append(f"- Linhas totais: `{fmt_int(fs['total_rows'])}`")
-    lines.append(f"- Tamanho total em disco: `{fmt_float(fs['total_size'] / (1024**3), 2)} GB`")
-    lines.append("")
-    lines.append("## 2. Volume por Sistema")
-    lines.append("")
-    lines.append("| Sistema | Arquivos | Linhas | Tamanho (GB) |")
-    lines.append("|---|---:|---:|---:|")
-    for sistema in sorted(fs["by_system"].keys()):
-        d = fs["by_system"][sistema]
-        lines.append(
-            f"| `{sistema}` | {fmt_int(d['files'])} | {fmt_int(d['rows'])} | {fmt_float(d['bytes']/(1024**3),2)} |"
-        )
-    lines.append("")
-    lines.append("## 3. Cobertura Temporal")
-    lines.append("")
-    lines.append("| Sistema | Ano | Meses distintos |")
-    lines.append("|---|---:|---:|")
-    for sistema, ano, meses in sql["months_cov"]:
-        lines.append(f"| `{sistema}` | {ano} | {meses} |")
-    lines.append("")
-    lines.append("## 4. Qualidade de Dados (Nulos em colunas-chave)")
-    lines.append("")
-    lines.append("| Coluna | Nulos | % Nulos |")
-    lines.append("|---|---:|---:|")
-    for name, val in [
-        ("main_icd", n_main_icd_null),
-        ("custo_total", n_custo_total_null),
-        ("idade_grupo", n_idade_grupo_null),
-        ("ano_mes", n_ano_mes_null),
-    ]:
-        pct = (val / n_rows * 100) if n_rows else 0.0
-        lines.append(f"| `{name}` | {fmt_int(int(val))} | {fmt_float(pct,2)}% |")
-    lines.append("")
-    lines.append("## 5. Estatísticas Financeiras (`custo_total`)")
-    lines.append("")
     min_v, p50_v, p95_v, avg_v, max_v = sql["custo"]
-    lines.append("| Métrica | Valor |")
-    lines.append("|---|---:|")
-    lines.append(f"| Mínimo | {fmt_float(min_v,2)} |")
-    lines.append(f"| P50 | {fmt_float(p50_v,2)} |")
-    lines.append(f"| P95 | {fmt_float(p95_v,2)} |")
-    lines.append(f"| Média | {fmt_float(avg_v,2)} |")
-    lines.append(f"| Máximo | {fmt_float(max_v,2)} |")
-    lines.append("")
-    lines.append("## 6. Top `icd_group`")
-    lines.append("")
-    lines.append("| # | Grupo | Linhas |")
-    lines.append("|---:|---|---:|")
-    for i, (grp, n) in enumerate(sql["top_icd"], start=1):
-        lines.append(f"| {i} | `{grp}` | {fmt_int(int(n))} |")
-    lines.append("")
-    lines.append("## 7. Top Procedimentos (`pa_proc_id`/`proc_rea`)")
-    lines.append("")
-    lines.append("| # | Procedimento | Linhas |")
-    lines.append("|---:|---|---:|")
-    for i, (proc, n) in enumerate(sql["top_proc"], start=1):
-        lines.append(f"| {i} | `{proc}` | {fmt_int(int(n))} |")
-    lines.append("")
-    lines.append("## 8. Método")
-    lines.append("")
-    lines.append("- Contagem de linhas por arquivo via metadado Parquet (`pyarrow`).")
-    lines.append("- Agregações analíticas e percentis via DuckDB sobre `data/processed/**/*.parquet`.")
-    lines.append("- Documento voltado a observabilidade da base e monitoramento de qualidade.")
-    lines.append("")
-    return "\n".join(lines) + "\n"
+
+    def pct(val) -> str:
+        return fmt_float((val / n_rows * 100) if n_rows else 0.0, 2)
+
+    buf = io.StringIO()
+    buf.write(
+        "# 06.2 - Estatísticas da Base Processada\n\n"
+        f"Atualizado em: `{ts}`\n\n"
+        "## 1. Volume Geral\n\n"
+        f"- Arquivos parquet: `{fmt_int(fs['total_files'])}`\n"
+        f"- Linhas totais: `{fmt_int(fs['total_rows'])}`\n"
+        f"- Tamanho total em disco: `{fmt_float(fs['total_size'] / GIB, 2)} GB`\n\n"
+        "## 2. Volume por Sistema\n\n"
+    )
+    buf.write(_table(
+        "| Sistema | Arquivos | Linhas | Tamanho (GB) |",
+        "|---|---:|---:|---:|",
+        (
+            f"| `{sistema}` | {fmt_int(d['files'])} | {fmt_int(d['rows'])} | {fmt_float(d['bytes'] / GIB, 2)} |"
+            for sistema, d in sorted(fs["by_system"].items())
+        ),
+    ))
+    buf.write("\n## 3. Cobertura Temporal\n\n")
+    buf.write(_table(
+        "| Sistema | Ano | Meses distintos |",
+        "|---|---:|---:|",
+        (f"| `{sistema}` | {ano} | {meses} |" for sistema, ano, meses in sql["months_cov"]),
+    ))
+    buf.write("\n## 4. Qualidade de Dados (Nulos em colunas-chave)\n\n")
+    buf.write(_table(
+        "| Coluna | Nulos | % Nulos |",
+        "|---|---:|---:|",
+        (
+            f"| `{name}` | {fmt_int(int(val))} | {pct(val)}% |"
+            for name, val in (
+                ("main_icd", n_main_icd_null),
+                ("custo_total", n_custo_total_null),
+                ("idade_grupo", n_idade_grupo_null),
+                ("ano_mes", n_ano_mes_null),
+            )
+        ),
+    ))
+    buf.write("\n## 5. Estatísticas Financeiras (`custo_total`, percentis aproximados)\n\n")
+    buf.write(_table(
+        "| Métrica | Valor |",
+        "|---|---:|",
+        (
+            f"| {label} | {fmt_float(v, 2)} |"
+            for label, v in (
+                ("Mínimo", min_v), ("P50 (aprox.)", p50_v), ("P95 (aprox.)", p95_v), ("Média", avg_v), ("Máximo", max_v),
+            )
+        ),
+    ))
+    buf.write("\n## 6. Top `icd_group`\n\n")
+    buf.write(_table(
+        "| # | Grupo | Linhas |",
+        "|---:|---|---:|",
+        (f"| {i} | `{grp}` | {fmt_int(int(n))} |" for i, (grp, n) in enumerate(sql["top_icd"], start=1)),
+    ))
+    buf.write("\n## 7. Top Procedimentos (`pa_proc_id`/`proc_rea`)\n\n")
+    buf.write(_table(
+        "| # | Procedimento | Linhas |",
+        "|---:|---|---:|",
+        (f"| {i} | `{proc}` | {fmt_int(int(n))} |" for i, (proc, n) in enumerate(sql["top_proc"], start=1)),
+    ))
+    buf.write(
+        "\n## 8. Método\n\n"
+        "- Contagem de linhas por arquivo via metadado Parquet (`parquet_file_metadata` no DuckDB), "
+        "com catálogo persistente em `data/.stats_cache.duckdb`.\n"
+        f"- Agregações analíticas e percentis via DuckDB sobre {sql['source']}.\n"
+        "- Percentis de `custo_total` aproximados (`approx_quantile`, T-Digest): uma passada, sem ordenação.\n"
+        "- Documento voltado a observabilidade da base e monitoramento de qualidade.\n\n"
+    )
+    return buf.getvalue()
 
 
 def main() -> None:
@@ -2,6 +2,7 @@
 # TODO: integrar rag.agent e retornar JSON conforme spec em docs/06-etapas-implementacao.md.
 
 from fastapi import FastAPI
+from fastapi.responses import Response
 
 app = FastAPI(
     title="SUS Data RAG API",
@@ -9,7 +10,10 @@ app = FastAPI(
     version="0.1.0",
 )
 
+# Corpo fixo: sem serialização JSON por requisição
+_HEALTH_BODY = b'{"status":"ok"}'
+
 
 @app.get("/health")
-def health():
-    return {"status": "ok"}
+def health() -> Response:
+    return Response(content=_HEALTH_BODY, media_type="application/json")
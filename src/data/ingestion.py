@@ -15,29 +15,46 @@ Fluxo:
 
 from __future__ import annotations
 
+import atexit
+import base64
 import errno
 import ftplib
+import functools
+import http.client
+import os
+import queue
 import random
 import re
+import shutil
 import socket
+import string
 import subprocess
 import tempfile
 import threading
 import time
 import urllib.error
+import urllib.parse
 import urllib.request
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
 from typing import Literal
 
+import numpy as np
 import pandas as pd
-import pyarrow as pa
-from pyarrow import parquet as pq
 
 from .log_util import log
 
+# Copy-on-Write (padrão a partir do pandas 3): filtros e _add_meta_* não precisam de .copy() defensivo
+if int(pd.__version__.split(".", 1)[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
 # --- Raiz e diretórios ---
+# Resolvida uma vez na importação (resolve() consulta o sistema de arquivos)
+_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
 def _root() -> Path:
-    return Path(__file__).resolve().parent.parent.parent
+    return _ROOT
 
 
 RAW_BASE = _root() / "data" / "raw"
@@ -62,9 +79,9 @@ LOG_ERRO_PATTERN = re.compile(
     re.IGNORECASE,
 )
 
-# Regex CID (alinhado ao R)
+# Regex CID (alinhado ao R); tolera espaços à esquerda e caixa, dispensando upper()/strip() na coluna
 CID_REGEX = re.compile(
-    r"^(E1[0-4]|I70|I73|I74|L97|M86|S78|S88|S98|T13\.6|T87|Z89|S72)",
+    r"^\s*(E1[0-4]|I70|I73|I74|L97|M86|S78|S88|S98|T13\.6|T87|Z89|S72)",
     re.IGNORECASE,
 )
 
@@ -77,7 +94,18 @@ SYSTEMS = ("SIH-RD", "SIA-PA")
 YEARS_DEFAULT = (2021, 2025)
 MONTHS = range(1, 13)
 CHUNK_SIZE = 80_000
+# Parquet em data/raw/: ZSTD + dicionário (colunas de baixa cardinalidade: uf, sistema, CID, grupos)
+# e estatísticas min/max por row group para pruning nas leituras seguintes
+PARQUET_WRITER_OPTIONS = dict(
+    compression="zstd",
+    compression_level=3,
+    use_dictionary=True,
+    data_page_size=1 << 20,
+    write_statistics=True,
+)
 DOWNLOAD_TIMEOUT = 600
+# Buffer de escrita/leitura dos downloads (1 MiB: menos syscalls que o padrão de 8 KiB)
+DOWNLOAD_BUFFER = 1 << 20
 MAX_ATTEMPTS = 3
 CONNECT_TIMEOUT = 30  # timeout só para o teste de conexão inicial
 # Script R: timeout por atividade (renova enquanto houver saída ou arquivo crescendo)
@@ -89,13 +117,26 @@ MAX_FAILURES_BEFORE_SKIP = 3
 # Circuit breaker (literatura): após N falhas por timeout, pausa X s antes de continuar
 CIRCUIT_BREAKER_THRESHOLD = 3
 CIRCUIT_BREAKER_COOLDOWN = 300  # 5 min
+# Alvos baixados/processados em paralelo (FTP DATASUS e espelho S3 aceitam algumas conexões simultâneas)
+INGEST_WORKERS = 4
+# DBC/DBF intermediários em RAM (/dev/shm) quando houver espaço; senão no tmp padrão
+SHM_DIR = Path("/dev/shm")
+SHM_MIN_FREE = 4 * 1024**3
+
 
+_WS_RE = re.compile(r"\s+")
+_NONALNUM_RE = re.compile(r"[^a-z0-9_]")
+_KEEP = frozenset(string.ascii_lowercase + string.digits + "_")
+# Remove (str.translate, em C) todo caractere latin-1 fora de [a-z0-9_]
+_DEL_TABLE = {i: None for i in range(256) if chr(i) not in _KEEP}
 
+
+@functools.lru_cache(maxsize=4096)
 def _clean_name(s: str) -> str:
     """Simula janitor::clean_names: minúsculo, espaços → underscore."""
-    s = str(s).strip().lower()
-    s = re.sub(r"\s+", "_", s)
-    s = re.sub(r"[^a-z0-9_]", "", s)
+    s = _WS_RE.sub("_", str(s).strip().lower()).translate(_DEL_TABLE)
+    if not s.isascii():
+        s = _NONALNUM_RE.sub("", s)  # raro: caracteres fora do latin-1
     return s or "unknown"
 
 
@@ -116,34 +157,69 @@ def _coalesce_duplicate_columns(df: pd.DataFrame) -> pd.DataFrame:
         if len(idx) == 1:
             out[col] = df.iloc[:, idx[0]]
         else:
-            block = df.iloc[:, idx]
-            out[col] = block.bfill(axis=1).iloc[:, 0]
+            # Primeira não-nula por linha sem materializar o bloco inteiro (bfill(axis=1))
+            arr = df.iloc[:, idx].to_numpy()
+            mask = pd.notna(arr)
+            picked = arr[np.arange(arr.shape[0]), mask.argmax(axis=1)]
+            empty = ~mask.any(axis=1)
+            if empty.any():
+                picked[empty] = np.nan
+            out[col] = pd.Series(picked, index=df.index)
     return pd.DataFrame(out)
 
 
-def _classify_cid(cid: str) -> str:
-    if not cid or (isinstance(cid, float) and pd.isna(cid)):
-        return "Sem CID"
-    cid = str(cid).strip().upper()
-    if re.match(r"^E1[0-4]", cid):
-        return "Diabetes"
-    if re.match(r"^(I70|I73|I74|L97)", cid):
-        return "Vascular"
-    if re.match(r"^(S78|S88|S98|T13\.6|S72)", cid):
-        return "Trauma"
-    if re.match(r"^(Z89|T87|M86)", cid):
-        return "Pos-Amputacao"
-    return "Outro"
+# Grupos de CID por prefixo (ordem importa: primeiro que casar)
+_ICD_GROUP_PATTERNS = (
+    ("Diabetes", re.compile(r"^\s*E1[0-4]", re.IGNORECASE)),
+    ("Vascular", re.compile(r"^\s*(?:I70|I73|I74|L97)", re.IGNORECASE)),
+    ("Trauma", re.compile(r"^\s*(?:S78|S88|S98|T13\.6|S72)", re.IGNORECASE)),
+    ("Pos-Amputacao", re.compile(r"^\s*(?:Z89|T87|M86)", re.IGNORECASE)),
+)
+
+
+def _classify_cid(cid: pd.Series) -> np.ndarray:
+    """
+    Grupo do CID por linha, vetorizado (kernels str do pandas + np.select).
+    Como no astype(str) + map original: só "" é "Sem CID"; nulo ("nan"/"None" lá) cai em "Outro".
+    """
+    s = cid.astype("string")
+    conds = [(s == "").fillna(False).to_numpy(dtype=bool)]
+    # Padrões compilados já toleram espaço à esquerda e caixa: sem strip()/upper() na coluna
+    conds += [s.str.match(pat, na=False).to_numpy(dtype=bool) for _, pat in _ICD_GROUP_PATTERNS]
+    choices = ["Sem CID"] + [group for group, _ in _ICD_GROUP_PATTERNS]
+    return np.select(conds, choices, default="Outro")
+
+
+# Diretórios de partição já criados nesta execução (evita um mkdir por chamada de _dest_path)
+_CREATED_DIRS: set[Path] = set()
+
+
+def _ensure_dir(dir_path: Path) -> None:
+    if dir_path not in _CREATED_DIRS:
+        dir_path.mkdir(parents=True, exist_ok=True)
+        _CREATED_DIRS.add(dir_path)
 
 
 def _dest_path(sistema: Literal["SIH", "SIA"], uf: str, year: int, month: int) -> Path:
     prefix = "sih" if sistema == "SIH" else "sia"
     name = f"{prefix}_{uf}_{year}_{month:02d}.parquet"
     dir_path = RAW_BASE / f"ano={year}" / f"uf={uf}" / f"sistema={sistema}"
-    dir_path.mkdir(parents=True, exist_ok=True)
+    _ensure_dir(dir_path)
     return dir_path / name
 
 
+def _tmp_path(dest: Path) -> Path:
+    """Arquivo temporário no mesmo diretório do destino (os.replace atômico, sem cópia)."""
+    return dest.parent / f".tmp_{dest.name}"
+
+
+def _discard_tmp(tmp: Path) -> None:
+    try:
+        tmp.unlink()
+    except FileNotFoundError:
+        pass
+
+
 def _download_cache_path(sistema: Literal["SIH", "SIA"], uf: str, year: int, month: int) -> Path:
     """Arquivo de cache do fallback R (somente etapa de download)."""
     dest = _dest_path(sistema, uf, year, month)
@@ -233,50 +309,203 @@ def _classify_error(e: BaseException) -> str:
     return s or type(e).__name__
 
 
+# Conexão FTP persistente por thread: evita TCP + LOGIN + CWD a cada arquivo.
+_ftp_local = threading.local()
+_FTP_OPEN: set[ftplib.FTP] = set()
+_FTP_OPEN_LOCK = threading.Lock()
+# Erros que indicam conexão reaproveitada derrubada pelo servidor (reconecta e tenta de novo uma vez).
+# Timeout não entra: servidor lento vai direto para o retry com backoff de _download_dbc.
+_FTP_STALE_ERRORS = (ftplib.error_temp, EOFError, ConnectionResetError, BrokenPipeError)
+
+
+def _drop_ftp() -> None:
+    """Descarta a conexão FTP da thread atual (sem propagar erro)."""
+    ftp = getattr(_ftp_local, "ftp", None)
+    _ftp_local.ftp = None
+    if ftp is None:
+        return
+    with _FTP_OPEN_LOCK:
+        _FTP_OPEN.discard(ftp)
+    try:
+        ftp.close()
+    except Exception:
+        pass
+
+
+def _get_ftp() -> tuple[ftplib.FTP, bool]:
+    """
+    (conexão FTP da thread atual, reaproveitada?). NOOP como sonda de vida; reconecta se o
+    servidor derrubou. Conexão recém-aberta volta com reaproveitada=False.
+    """
+    ftp = getattr(_ftp_local, "ftp", None)
+    if ftp is not None:
+        try:
+            ftp.voidcmd("NOOP")
+            return ftp, True
+        except Exception:
+            _drop_ftp()
+    ftp = ftplib.FTP(timeout=DOWNLOAD_TIMEOUT)
+    ftp.connect(FTP_HOST, port=21)
+    ftp.login()
+    _ftp_local.ftp = ftp
+    with _FTP_OPEN_LOCK:
+        _FTP_OPEN.add(ftp)
+    return ftp, False
+
+
+@atexit.register
+def _close_all_ftp() -> None:
+    with _FTP_OPEN_LOCK:
+        conns = list(_FTP_OPEN)
+        _FTP_OPEN.clear()
+    for ftp in conns:
+        try:
+            ftp.quit()
+        except Exception:
+            try:
+                ftp.close()
+            except Exception:
+                pass
+
+
 def _download_dbc_ftp(system: str, uf: str, year: int, month: int, path: Path) -> tuple[bool, str]:
     """Baixa DBC via FTP (ftplib). Lista o diretório antes (inventário) para evitar 550. Retorna (sucesso, mensagem_erro)."""
     remote = _ftp_remote_path(system, uf, year, month)
     remote_dir = remote.rsplit("/", 1)[0]  # ex.: /dissemin/publicos/SIHSUS/200801_/Dados
     filename = remote.rsplit("/", 1)[-1]   # ex.: RDAC2512.dbc
-    try:
-        ftp = ftplib.FTP(timeout=DOWNLOAD_TIMEOUT)
-        ftp.connect(FTP_HOST, port=21)
-        ftp.login()
-        ftp.cwd(remote_dir)
-        # Pré-checagem: LIST/NLST do diretório (literatura: evita 550, confirma existência)
+    while True:
+        reused = False
         try:
-            listing = [f.upper() for f in ftp.nlst()]
-            if filename.upper() not in listing:
-                ftp.quit()
-                return False, "Arquivo inexistente no servidor (não está na listagem do diretório)."
-        except (OSError, ftplib.error_perm):
-            pass  # NLST pode falhar em alguns servidores; segue tentativa de RETR
-        with path.open("wb") as f:
-            ftp.retrbinary(f"RETR {filename}", f.write)
-        ftp.quit()
-        # Validação mínima: arquivo não vazio (evita processar download truncado)
-        if path.stat().st_size == 0:
-            return False, "Download retornou arquivo vazio."
-        return True, ""
-    except Exception as e:
-        return False, _classify_error(e)
+            ftp, reused = _get_ftp()
+            ftp.cwd(remote_dir)
+            # Pré-checagem: LIST/NLST do diretório (literatura: evita 550, confirma existência)
+            try:
+                listing = [f.upper() for f in ftp.nlst()]
+                if filename.upper() not in listing:
+                    return False, "Arquivo inexistente no servidor (não está na listagem do diretório)."
+            except ftplib.error_perm:
+                pass  # NLST pode falhar em alguns servidores; segue tentativa de RETR
+            with path.open("wb", buffering=DOWNLOAD_BUFFER) as f:
+                ftp.retrbinary(f"RETR {filename}", f.write, blocksize=1 << 16)
+            # Validação mínima: arquivo não vazio (evita processar download truncado)
+            if path.stat().st_size == 0:
+                return False, "Download retornou arquivo vazio."
+            return True, ""
+        except _FTP_STALE_ERRORS as e:
+            # Conexão reaproveitada pode ter caído entre o NOOP e o RETR (421/425/426/reset):
+            # reconecta e tenta de novo, uma vez (a nova conexão não é reaproveitada)
+            _drop_ftp()
+            if not reused:
+                return False, _classify_error(e)
+        except ftplib.error_perm as e:
+            return False, _classify_error(e)  # 550 etc.: a conexão continua válida
+        except Exception as e:
+            _drop_ftp()  # inclui timeout: sem retry aqui, fica com o laço externo
+            return False, _classify_error(e)
+
+
+# Conexão HTTP keep-alive por thread e host (espelho S3): sem novo TCP + TLS a cada arquivo.
+_http_local = threading.local()
+# Erros de conexão reaproveitada que o servidor fechou (reconecta e tenta de novo uma vez)
+_HTTP_STALE_ERRORS = (http.client.RemoteDisconnected, http.client.CannotSendRequest, ConnectionResetError, BrokenPipeError)
+# Redirecionamentos seguidos como o urllib (Location relativo ou absoluto, outro host inclusive)
+_HTTP_REDIRECTS = (301, 302, 303, 307, 308)
+_HTTP_MAX_REDIRECTS = 5
+
+
+def _http_proxy(scheme: str, host: str) -> urllib.parse.SplitResult | None:
+    """Proxy de http_proxy/https_proxy (e no_proxy) para o host, como no urllib; None se direto."""
+    proxy = urllib.request.getproxies().get(scheme)
+    if not proxy or urllib.request.proxy_bypass(host):
+        return None
+    return urllib.parse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+
+
+def _http_conn(scheme: str, netloc: str) -> tuple[http.client.HTTPConnection, bool, dict[str, str]]:
+    """
+    (conexão, alvo em URL absoluta?, cabeçalhos extras) da thread atual para scheme://netloc.
+    Com proxy: http vai ao proxy com a URL absoluta; https abre túnel CONNECT pelo proxy.
+    """
+    conns = getattr(_http_local, "conns", None)
+    if conns is None:
+        conns = _http_local.conns = {}
+    entry = conns.get((scheme, netloc))
+    if entry is None:
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        proxy = _http_proxy(scheme, urllib.parse.urlsplit(f"//{netloc}").hostname or netloc)
+        if proxy is None:
+            entry = (cls(netloc, timeout=DOWNLOAD_TIMEOUT), False, {})
+        else:
+            auth = {}
+            if proxy.username:
+                cred = f"{urllib.parse.unquote(proxy.username)}:{urllib.parse.unquote(proxy.password or '')}"
+                auth["Proxy-Authorization"] = "Basic " + base64.b64encode(cred.encode()).decode("ascii")
+            conn = cls(proxy.hostname, proxy.port or 80, timeout=DOWNLOAD_TIMEOUT)
+            if scheme == "https":
+                conn.set_tunnel(netloc, headers=auth)
+                entry = (conn, False, {})
+            else:
+                entry = (conn, True, auth)
+        conns[(scheme, netloc)] = entry
+    return entry
+
+
+def _drop_http_conn(scheme: str, netloc: str) -> None:
+    entry = getattr(_http_local, "conns", {}).pop((scheme, netloc), None)
+    if entry is not None:
+        entry[0].close()
 
 
 def _download_dbc_http(url: str, path: Path) -> tuple[bool, str]:
-    """Baixa DBC via HTTP (espelho S3 ou gateway). Retorna (sucesso, mensagem_erro)."""
-    try:
-        req = urllib.request.Request(url, headers={"User-Agent": "datas-rag-sus/1.0"})
-        with urllib.request.urlopen(req, timeout=DOWNLOAD_TIMEOUT) as r:
-            path.write_bytes(r.read())
-        if path.stat().st_size == 0:
-            return False, "Download retornou arquivo vazio."
-        return True, ""
-    except urllib.error.HTTPError as e:
-        if e.code in (404, 410) or "550" in str(e):
-            return False, "Arquivo inexistente no servidor (404/550)."
-        return False, _classify_error(e)
-    except Exception as e:
-        return False, _classify_error(e)
+    """Baixa DBC via HTTP (espelho S3 ou gateway), em streaming e com conexão reaproveitada. Retorna (sucesso, mensagem_erro)."""
+    for _ in range(_HTTP_MAX_REDIRECTS + 1):
+        ok, err, location = _http_get_to_file(url, path)
+        if location is None:
+            return ok, err
+        url = urllib.parse.urljoin(url, location)
+    return False, f"Erro HTTP: mais de {_HTTP_MAX_REDIRECTS} redirecionamentos."
+
+
+def _http_get_to_file(url: str, path: Path) -> tuple[bool, str, str | None]:
+    """GET de url gravado em path: (sucesso, mensagem_erro, Location se a resposta for redirecionamento)."""
+    parts = urllib.parse.urlsplit(url)
+    path_qs = parts.path + (f"?{parts.query}" if parts.query else "")
+    headers = {"User-Agent": "datas-rag-sus/1.0", "Connection": "keep-alive"}
+    for attempt in (1, 2):
+        conn, absolute, extra = _http_conn(parts.scheme, parts.netloc)
+        try:
+            conn.request("GET", url if absolute else path_qs, headers={**headers, **extra})
+            r = conn.getresponse()
+            if r.status in _HTTP_REDIRECTS and r.getheader("Location"):
+                r.read()
+                return False, "", r.getheader("Location")
+            if r.status in (404, 410):
+                r.read()
+                return False, "Arquivo inexistente no servidor (404/550).", None
+            if r.status >= 300:
+                r.read()
+                return False, f"Erro HTTP {r.status}: {r.reason}", None
+            expected = int(r.getheader("Content-Length") or 0)
+            written = 0
+            with path.open("wb", buffering=DOWNLOAD_BUFFER) as f:
+                while chunk := r.read(DOWNLOAD_BUFFER):
+                    f.write(chunk)
+                    written += len(chunk)
+            if r.will_close:
+                _drop_http_conn(parts.scheme, parts.netloc)
+            if expected and written != expected:
+                return False, f"Download incompleto ({written} de {expected} bytes).", None
+            if path.stat().st_size == 0:
+                return False, "Download retornou arquivo vazio.", None
+            return True, "", None
+        except _HTTP_STALE_ERRORS as e:
+            _drop_http_conn(parts.scheme, parts.netloc)
+            if attempt == 2:
+                return False, _classify_error(e), None
+        except Exception as e:
+            _drop_http_conn(parts.scheme, parts.netloc)
+            return False, _classify_error(e), None
+    return False, "Falha no download HTTP.", None
 
 
 def _download_dbc(system: str, uf: str, year: int, month: int, path: Path) -> tuple[bool, str]:
@@ -305,15 +534,237 @@ def _download_dbc(system: str, uf: str, year: int, month: int, path: Path) -> tu
     return False, f"FTP: {err_ftp} | S3: {err}"
 
 
-def _records_to_clean_df(records: list[dict]) -> pd.DataFrame:
-    """Lista de dict (DBF record) → DataFrame com colunas em snake_case."""
-    if not records:
-        return pd.DataFrame()
-    df = pd.DataFrame(records)
+def _clean_df(df: pd.DataFrame) -> pd.DataFrame:
+    """Nomes em snake_case + coalesce de colunas que colidem após a normalização."""
     df.columns = [_clean_name(c) for c in df.columns]
     return _coalesce_duplicate_columns(df)
 
 
+# Tipos de campo DBF que o leitor colunar sabe converter (demais: fallback dbfread)
+_DBF_COLUMNAR_TYPES = frozenset("CNFDL")
+
+
+def _dbf_layout(path: Path) -> tuple[int, int, int, list[tuple[str, str, int, int, int]]] | None:
+    """
+    Lê o cabeçalho DBF: (n_registros, tamanho_cabeçalho, tamanho_registro, campos).
+    Campos = (nome, tipo, offset no registro, largura, casas decimais). None se houver tipo não suportado.
+    Como no dbfread, n_registros vem do tamanho do arquivo (registros completos após o cabeçalho), não
+    do contador do cabeçalho; o marcador de fim 0x1A é tratado na leitura (_iter_dbf_columnar).
+    """
+    with path.open("rb") as f:
+        head = f.read(32)
+        if len(head) < 32:
+            return None
+        header_len = int.from_bytes(head[8:10], "little")
+        record_len = int.from_bytes(head[10:12], "little")
+        desc = f.read(max(header_len - 32, 0))
+        size = os.fstat(f.fileno()).st_size
+    fields = []
+    offset = 1  # byte 0 do registro = flag de exclusão
+    for i in range(0, len(desc) - 31, 32):
+        if desc[i] in (0x0D, 0x0A):
+            break
+        name = desc[i:i + 11].split(b"\0", 1)[0].decode("latin-1")
+        ftype = chr(desc[i + 11])
+        width, dec = desc[i + 16], desc[i + 17]
+        if ftype not in _DBF_COLUMNAR_TYPES:
+            return None
+        if ftype == "C":
+            # Campo C com mais de 255 bytes: byte alto da largura fica em "casas decimais" (como no dbfread)
+            width, dec = width | dec << 8, 0
+        fields.append((name, ftype, offset, width, dec))
+        offset += width
+    if not fields or offset > record_len:
+        return None
+    n_rec = max(size - header_len, 0) // record_len
+    return n_rec, header_len, record_len, fields
+
+
+def _dbf_column(raw: np.ndarray, ftype: str) -> np.ndarray | pd.Series:
+    """Converte a fatia bytes de um campo DBF no mesmo valor que o dbfread produziria."""
+    if ftype == "C":
+        return np.char.decode(np.char.rstrip(raw, b"\0 "), "latin-1").astype(object)
+    if ftype in "NF":
+        # Vazio ou '***' (estouro) → NaN; inteiros ficam int64 se a coluna não tiver nulos
+        txt = np.char.decode(np.char.strip(np.char.strip(raw), b"*"), "latin-1")
+        return pd.to_numeric(pd.Series(txt, copy=False).str.replace(",", ".", regex=False), errors="coerce")
+    if ftype == "D":
+        dates = pd.to_datetime(pd.Series(np.char.decode(raw, "latin-1")), format="%Y%m%d", errors="coerce")
+        return dates.dt.date.astype(object).where(dates.notna(), None)
+    # L: T/Y → True, F/N → False, '?'/' ' → None
+    flag = np.char.upper(np.char.decode(raw, "latin-1"))
+    out = np.full(flag.shape, None, dtype=object)
+    out[np.isin(flag, ["T", "Y"])] = True
+    out[np.isin(flag, ["F", "N"])] = False
+    return out
+
+
+def _iter_dbf_columnar(path: Path, layout: tuple, chunk_size: int = CHUNK_SIZE):
+    """
+    Lê o DBF por colunas: um memmap do arquivo e, por campo, uma view de largura fixa
+    (stride = tamanho do registro), sem dict por registro. Gera DataFrames de chunk_size linhas.
+    """
+    n_rec, header_len, record_len, fields = layout
+    if n_rec == 0:
+        return
+    mm = np.memmap(path, dtype=np.uint8, mode="r")
+
+    def view(offset: int, width: int, start: int, stop: int) -> np.ndarray:
+        return np.ndarray(
+            shape=(stop - start,), dtype=f"S{width}", buffer=mm,
+            offset=header_len + start * record_len + offset, strides=(record_len,),
+        )
+
+    # Como no dbfread: 0x1A no início de um registro encerra a leitura
+    eof = np.flatnonzero(view(0, 1, 0, n_rec) == b"\x1a")
+    if eof.size:
+        n_rec = int(eof[0])
+
+    for start in range(0, n_rec, chunk_size):
+        stop = min(start + chunk_size, n_rec)
+        # Só registros com flag " " (dbfread ignora "*" = excluído e qualquer outro valor)
+        live = view(0, 1, start, stop) == b" "
+        cols: dict[str, np.ndarray] = {}
+        for name, ftype, offset, width, _dec in fields:
+            raw = view(offset, width, start, stop)
+            if not live.all():
+                raw = raw[live]
+            col = _dbf_column(raw, ftype)
+            cols[name] = col.to_numpy() if isinstance(col, pd.Series) else col
+        yield _clean_df(pd.DataFrame(cols))
+
+
+def _iter_dbf_records(path: Path, chunk_size: int = CHUNK_SIZE):
+    """Leitura registro a registro via dbfread (fallback para DBF com tipos de campo incomuns)."""
+    from dbfread import DBF
+
+    tbl = DBF(str(path), encoding="latin-1")
+    names = list(dict.fromkeys(tbl.field_names))
+    # Acumula direto por coluna (sem um dict por registro nem transposição em pd.DataFrame(list_of_dicts))
+    cols: dict[str, list] = {name: [] for name in names}
+    n = 0
+    for record in tbl:
+        for k, v in record.items():
+            cols[k].append(v)
+        n += 1
+        if n >= chunk_size:
+            yield _clean_df(pd.DataFrame(cols, copy=False))
+            cols = {name: [] for name in names}
+            n = 0
+    if n:
+        yield _clean_df(pd.DataFrame(cols, copy=False))
+
+
+def _iter_dbf(path: Path, chunk_size: int = CHUNK_SIZE):
+    """DataFrames (colunas limpas) do DBF em chunks: leitor colunar quando o layout é suportado."""
+    layout = _dbf_layout(path)
+    if layout is None:
+        return _iter_dbf_records(path, chunk_size)
+    return _iter_dbf_columnar(path, layout, chunk_size)
+
+
+def _dbf_arrow_types(path: Path) -> dict:
+    """Tipo Arrow declarado de cada coluna (nome limpo) segundo o cabeçalho DBF; nomes ambíguos ficam de fora."""
+    import pyarrow as pa
+
+    layout = _dbf_layout(path)
+    if layout is None:
+        return {}
+    types: dict = {}
+    conflicts: set[str] = set()
+    for name, ftype, _offset, _width, dec in layout[3]:
+        if ftype in "NF":
+            t = pa.float64() if dec else pa.int64()
+        elif ftype == "D":
+            t = pa.date32()
+        elif ftype == "L":
+            t = pa.bool_()
+        else:
+            t = pa.string()
+        key = _clean_name(name)
+        if key in types and types[key] != t:
+            conflicts.add(key)
+        types[key] = t
+    for key in conflicts:
+        del types[key]
+    return types
+
+
+def _meta_arrow_types() -> dict:
+    """Tipos Arrow das colunas acrescentadas por _add_meta_sih/_add_meta_sia."""
+    import pyarrow as pa
+
+    return {
+        "pa_grupo": pa.string(), "pa_subgru": pa.string(),
+        "uf_origem": pa.string(), "ano_cmpt": pa.int64(), "mes_cmpt": pa.int64(),
+        "sistema": pa.string(), "main_icd": pa.string(), "icd_group": pa.string(),
+        "opm_flag": pa.bool_(), "fisio_flag": pa.bool_(),
+    }
+
+
+def _arrow_writer_schema(df: pd.DataFrame, declared: dict):
+    """
+    Schema fixo do Parquet: tipos declarados (DBF + meta) e, para o resto, o inferido do primeiro
+    chunk, com colunas só-nulas como string. Todos os chunks são convertidos para ele, evitando
+    divergência de schema entre chunks (ex.: coluna toda nula num chunk e preenchida no seguinte).
+    """
+    import pyarrow as pa
+
+    inferred = pa.Schema.from_pandas(df, preserve_index=False)
+    fields = []
+    for f in inferred:
+        t = declared.get(f.name)
+        if t is None:
+            t = pa.string() if pa.types.is_null(f.type) else f.type
+        fields.append(pa.field(f.name, t))
+    return pa.schema(fields)
+
+
+_PREFETCH_DONE = object()
+
+
+def _prefetch(items, maxsize: int = 2):
+    """
+    Consome `items` numa thread produtora e repassa por uma fila limitada: a leitura do próximo
+    chunk DBF sobrepõe filtro/meta/escrita Parquet do atual. Exceções do produtor são relançadas aqui.
+    """
+    q: queue.Queue = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(e)
+            return
+        put(_PREFETCH_DONE)
+
+    t = threading.Thread(target=produce, daemon=True)
+    t.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _PREFETCH_DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()  # consumidor saiu (fim, erro ou abandono): libera o produtor
+        t.join()
+
+
 def _filter_sih(df: pd.DataFrame) -> pd.DataFrame:
     """Filtro SIH: diag_princ no CID regex ou proc_rea começa com 0415."""
     if df.empty:
@@ -322,12 +773,33 @@ def _filter_sih(df: pd.DataFrame) -> pd.DataFrame:
     proc = df.get("proc_rea")
     if diag is None:
         return pd.DataFrame()
-    diag = diag.astype(str)
-    mask_cid = diag.str.upper().str.strip().str.match(CID_REGEX.pattern, na=False)
+    # Colunas inteiramente nulas (comum em arquivos antigos) não passam por kernels de string
+    mask_cid = False
+    if diag.notna().any():
+        mask_cid = diag.astype("string").str.match(CID_REGEX, na=False)
     mask_proc = False
-    if proc is not None:
+    if proc is not None and proc.notna().any():
         mask_proc = proc.astype(str).str.strip().str.startswith("0415")
-    return df.loc[mask_cid | mask_proc].copy()
+    if mask_cid is False and mask_proc is False:
+        return df.iloc[:0]
+    return df.loc[mask_cid | mask_proc]
+
+
+# "00".."99": grupo/subgrupo SIGTAP em texto (como no zfill(10) original) a partir do inteiro
+_TWO_DIGITS = np.array([f"{i:02d}" for i in range(100)], dtype=object)
+
+
+def _sigtap_group(proc: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """
+    pa_proc_id (10 dígitos GGSSFFPPPD) → (grupo, subgrupo) como int8 por aritmética inteira;
+    -1 onde o código não é numérico. Evita astype(str).zfill(10) + dois fatiamentos .str.
+    """
+    code = pd.to_numeric(proc, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    valid = ~np.isnan(code)
+    code = np.where(valid, code, 0).astype(np.int64)
+    grupo = np.where(valid, code // 10**8, -1).astype(np.int8)
+    subgru = np.where(valid, (code // 10**6) % 100, -1).astype(np.int8)
+    return grupo, subgru
 
 
 def _filter_sia(df: pd.DataFrame) -> pd.DataFrame:
@@ -337,58 +809,66 @@ def _filter_sia(df: pd.DataFrame) -> pd.DataFrame:
     proc = df.get("pa_proc_id")
     if proc is None:
         return pd.DataFrame()
-    proc = proc.astype(str).str.zfill(10)
-    pa_grupo = proc.str[:2]
-    pa_subgru = proc.str[2:4]
+    pa_grupo, pa_subgru = _sigtap_group(proc)
     cid = df.get("pa_cidpri")
-    if cid is not None:
-        cid = cid.astype(str).str.upper().str.strip()
+    if cid is not None and cid.notna().any():
+        mask_cid = cid.astype("string").str.match(CID_REGEX, na=False).to_numpy(dtype=bool)
     else:
-        cid = pd.Series([""] * len(df))
-    mask_cid = cid.str.match(CID_REGEX.pattern, na=False)
-    mask1 = (pa_grupo == "03") & (pa_subgru == "02") & mask_cid
-    mask2 = (pa_grupo == "07") & (pa_subgru.isin(["01", "02"]))
-    return df.loc[mask1 | mask2].copy()
+        mask_cid = False
+    mask1 = (pa_grupo == 3) & (pa_subgru == 2) & mask_cid
+    mask2 = (pa_grupo == 7) & ((pa_subgru == 1) | (pa_subgru == 2))
+    return df.loc[mask1 | mask2]
 
 
 def _add_meta_sih(df: pd.DataFrame, uf: str, year: int, month: int) -> pd.DataFrame:
-    df = df.copy()
+    # Sem cópia defensiva: o chunk é temporário do chamador (CoW protege eventuais views)
     df["uf_origem"] = uf
     df["ano_cmpt"] = year
     df["mes_cmpt"] = month
     df["sistema"] = "SIH"
     df["main_icd"] = df.get("diag_princ", pd.Series(dtype=object))
-    df["icd_group"] = df["main_icd"].astype(str).map(_classify_cid)
+    df["icd_group"] = _classify_cid(df["main_icd"])
     df["opm_flag"] = False
     df["fisio_flag"] = False
     return df
 
 
 def _add_meta_sia(df: pd.DataFrame, uf: str, year: int, month: int) -> pd.DataFrame:
-    df = df.copy()
-    proc = df.get("pa_proc_id", pd.Series(dtype=object)).astype(str).str.zfill(10)
-    df["pa_grupo"] = proc.str[:2]
-    df["pa_subgru"] = proc.str[2:4]
+    grupo, subgru = _sigtap_group(df.get("pa_proc_id", pd.Series(np.nan, index=df.index)))
+    df["pa_grupo"] = np.where(grupo >= 0, _TWO_DIGITS[grupo], None)
+    df["pa_subgru"] = np.where(subgru >= 0, _TWO_DIGITS[subgru], None)
     df["uf_origem"] = uf
     df["ano_cmpt"] = year
     df["mes_cmpt"] = month
     df["sistema"] = "SIA"
     df["main_icd"] = df.get("pa_cidpri", pd.Series(dtype=object))
-    df["icd_group"] = df["main_icd"].astype(str).map(_classify_cid)
-    df["opm_flag"] = df["pa_grupo"] == "07"
-    df["fisio_flag"] = (df["pa_grupo"] == "03") & (df["pa_subgru"] == "02")
+    df["icd_group"] = _classify_cid(df["main_icd"])
+    df["opm_flag"] = grupo == 7
+    df["fisio_flag"] = (grupo == 3) & (subgru == 2)
     return df
 
 
+def _scratch_dir() -> str | None:
+    """Diretório para os temporários DBC/DBF: /dev/shm (tmpfs) se existir, gravável e com folga."""
+    try:
+        if os.access(SHM_DIR, os.W_OK) and shutil.disk_usage(SHM_DIR).free >= SHM_MIN_FREE:
+            return str(SHM_DIR)
+    except OSError:
+        pass
+    return None  # tempfile usa TMPDIR / padrão do sistema
+
+
 def _process_dbc_python(
     system: str, uf: str, year: int, month: int
 ) -> tuple[bool, str]:
     """Baixa DBC, descomprime, processa em chunks e grava Parquet. 100% Python."""
     import datasus_dbc  # optional
-    from dbfread import DBF
+    import pyarrow as pa  # lazy: listar alvos (get_targets) não precisa do pyarrow
+    from pyarrow import parquet as pq
 
     dest = _dest_path(_system_to_label(system), uf, year, month)
-    with tempfile.TemporaryDirectory() as tmp:
+    tmp_dest = _tmp_path(dest)
+    with tempfile.TemporaryDirectory(dir=_scratch_dir()) as tmp:
         tmp = Path(tmp)
         dbc_path = tmp / "file.dbc"
         dbf_path = tmp / "file.dbf"
@@ -405,40 +885,32 @@ def _process_dbc_python(
         meta_fn = _add_meta_sih if system == "SIH-RD" else _add_meta_sia
         writer = None
         schema = None
-        chunk = []
         n_written = 0
+        declared = {**_dbf_arrow_types(dbf_path), **_meta_arrow_types()}
         try:
-            for record in DBF(str(dbf_path), encoding="latin-1"):
-                chunk.append(dict(record))
-                if len(chunk) >= CHUNK_SIZE:
-                    df = _records_to_clean_df(chunk)
-                    chunk = []
-                    df = filter_fn(df)
-                    if df.empty:
-                        continue
-                    df = meta_fn(df, uf, year, month)
-                    table = pa.Table.from_pandas(df, preserve_index=False)
-                    if schema is None:
-                        schema = table.schema
-                        writer = pq.ParquetWriter(str(dest), schema)
-                    writer.write_table(table)
-                    n_written += len(df)
-            if chunk:
-                df = _records_to_clean_df(chunk)
+            for df in _prefetch(_iter_dbf(dbf_path)):
                 df = filter_fn(df)
-                if not df.empty:
-                    df = meta_fn(df, uf, year, month)
-                    table = pa.Table.from_pandas(df, preserve_index=False)
-                    if schema is None:
-                        schema = table.schema
-                        writer = pq.ParquetWriter(str(dest), schema)
-                    writer.write_table(table)
-                    n_written += len(df)
-        finally:
+                if df.empty:
+                    continue
+                df = meta_fn(df, uf, year, month)
+                if schema is None:
+                    schema = _arrow_writer_schema(df, declared)
+                    writer = pq.ParquetWriter(str(tmp_dest), schema, **PARQUET_WRITER_OPTIONS)
+                table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+                writer.write_table(table, row_group_size=CHUNK_SIZE)
+                n_written += len(df)
+        except BaseException:
+            # Falha no meio da gravação: não deixar Parquet parcial para trás
             if writer is not None:
                 writer.close()
+            _discard_tmp(tmp_dest)
+            raise
+        if writer is not None:
+            writer.close()
         if schema is None:
             return False, "Nenhum registro passou no filtro"
+        # Publica só o arquivo completo: rename atômico no mesmo diretório
+        os.replace(tmp_dest, dest)
         if not dest.exists():
             return False, "Parquet não foi gravado"
     return True, ""
@@ -450,49 +922,64 @@ def _targets_from_log() -> set[tuple[str, str, int, int]]:
         return targets
     text = LOG_FILE.read_text(encoding="utf-8", errors="replace")
     for m in LOG_ERRO_PATTERN.finditer(text):
-        system, uf, year, month = m.group(1), m.group(2).upper(), int(m.group(3)), int(m.group(4))
+        system, uf, year, month = m.group(1).upper(), m.group(2).upper(), int(m.group(3)), int(m.group(4))
         targets.add((system, uf, year, month))
     return targets
 
 
-def _count_failures_in_log(system: str, uf: str, year: int, month: int) -> int:
+def _load_failure_counts() -> dict[tuple[str, str, int, int], int]:
     """
-    Conta quantas vezes este arquivo (system, uf, year, month) aparece no log
-    como falha (ERRO ingestão, ERRO PROCESSAMENTO ou FALHA DEFINITIVA DOWNLOAD).
+    Lê o log uma vez e conta, por arquivo (system, uf, year, month), as linhas de falha
+    (ERRO ingestão, ERRO PROCESSAMENTO ou FALHA DEFINITIVA DOWNLOAD).
     """
+    counts: dict[tuple[str, str, int, int], int] = {}
     if not LOG_FILE.is_file():
-        return 0
+        return counts
     text = LOG_FILE.read_text(encoding="utf-8", errors="replace")
-    label = f"{system} {uf} {year} {month:02d}"
-    label_alt = f"{system} {uf} {year} {month}" if month < 10 else None
-    count = 0
     for line in text.splitlines():
-        if "ERRO ingestão" in line and (label in line or (label_alt and label_alt in line)):
-            count += 1
-        else:
-            m = LOG_ERRO_PATTERN.search(line)
-            if m and m.group(1) == system and m.group(2).upper() == uf.upper() and int(m.group(3)) == year and int(m.group(4)) == month:
-                count += 1
-    return count
+        m = LOG_ERRO_PATTERN.search(line)
+        if m:
+            key = (m.group(1).upper(), m.group(2).upper(), int(m.group(3)), int(m.group(4)))
+            counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+# Arquivo final em data/raw/ano=YYYY/uf=UF/sistema=SIH|SIA/ (temporários .tmp_* não contam)
+_RAW_FILE_RE = re.compile(r"^(sih|sia)_([A-Z]{2})_(\d{4})_(\d{2})\.parquet$")
+
+
+def _existing_raw() -> set[tuple[str, str, int, int]]:
+    """(system, uf, year, month) já presentes em data/raw/, numa única varredura dos diretórios."""
+    out: set[tuple[str, str, int, int]] = set()
+    if not RAW_BASE.is_dir():
+        return out
+    for root, _dirs, files in os.walk(RAW_BASE):
+        for name in files:
+            m = _RAW_FILE_RE.match(name)
+            if m:
+                system = "SIH-RD" if m.group(1) == "sih" else "SIA-PA"
+                out.add((system, m.group(2), int(m.group(3)), int(m.group(4))))
+    return out
 
 
 def _targets_missing(
     years: tuple[int, int] = YEARS_DEFAULT,
     skip_future: bool = True,
+    existing: set[tuple[str, str, int, int]] | None = None,
 ) -> set[tuple[str, str, int, int]]:
     from datetime import date
-    targets = set()
     today = date.today()
     y_min, y_max = years
-    for system in SYSTEMS:
-        for uf in STATES:
-            for year in range(y_min, y_max + 1):
-                for month in MONTHS:
-                    if skip_future and (year, month) > (today.year, today.month):
-                        continue
-                    if not _dest_path(_system_to_label(system), uf, year, month).exists():
-                        targets.add((system, uf, year, month))
-    return targets
+    grid = {
+        (system, uf, year, month)
+        for system in SYSTEMS
+        for uf in STATES
+        for year in range(y_min, y_max + 1)
+        for month in MONTHS
+        if not (skip_future and (year, month) > (today.year, today.month))
+    }
+    # Diff por conjunto: uma varredura de data/raw/ em vez de um stat() por alvo da grade
+    return grid - (_existing_raw() if existing is None else existing)
 
 
 def get_targets(
@@ -501,17 +988,13 @@ def get_targets(
     years: tuple[int, int] = YEARS_DEFAULT,
 ) -> list[tuple[str, str, int, int]]:
     """Alvos = diff (grade desejada menos data/raw/). Opcional: unir com entradas do log de erros."""
+    existing = _existing_raw()  # uma varredura de data/raw/ serve à grade e às entradas do log
     targets = set()
     if include_missing:
-        targets |= _targets_missing(years=years)
+        targets |= _targets_missing(years=years, existing=existing)
     if from_log:
-        targets |= _targets_from_log()
-    out = []
-    for system, uf, year, month in targets:
-        if not _dest_path(_system_to_label(system), uf, year, month).exists():
-            out.append((system, uf, year, month))
-    out.sort(key=lambda x: (x[1], x[2], x[3], x[0]))
-    return out
+        targets |= _targets_from_log() - existing
+    return sorted(targets, key=lambda x: (x[1], x[2], x[3], x[0]))
 
 
 def _is_file_not_found_error(err: str) -> bool:
@@ -533,6 +1016,7 @@ _R_STDERR_SKIP = (
     "[etapa]", "[chunk]", "baixando", "modo único arquivo", "tentativa ",
     "ℹ", "connection seems", "server seems",
 )
+_R_STDERR_SKIP_RE = re.compile("|".join(re.escape(p) for p in _R_STDERR_SKIP), re.IGNORECASE)
 
 
 def _r_stderr_to_log_message(returncode: int, stderr_chunks: list[str]) -> str:
@@ -542,8 +1026,7 @@ def _r_stderr_to_log_message(returncode: int, stderr_chunks: list[str]) -> str:
         return base
     lines = [ln.strip() for ln in stderr_chunks if ln.strip()]
     for ln in lines:
-        low = ln.lower()
-        if any(skip in low for skip in _R_STDERR_SKIP):
+        if _R_STDERR_SKIP_RE.search(ln):
             continue
         if len(ln) > 120:
             ln = ln[:117] + "..."
@@ -674,13 +1157,56 @@ def _run_r_download_only(system: str, uf: str, year: int, month: int) -> tuple[b
         return False, str(e)
 
 
+# Prefixos GGSS de pa_proc_id que podem passar no filtro SIA (03.02 fisio; 07.01/07.02 OPM)
+_SIA_PROC_PREFIXES = ["0302", "0701", "0702"]
+
+
+def _arrow_prefilter(batch, system: str):
+    """
+    Pré-filtro em Arrow (C++) de um batch do cache R: descarta linhas que certamente não passam
+    em _filter_sih/_filter_sia antes do to_pandas(). Conservador: o filtro pandas continua sendo
+    aplicado depois; colunas ausentes/ambíguas ou valores atípicos mantêm a linha.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    names = [_clean_name(c) for c in batch.schema.names]
+
+    def col(name: str):
+        idx = [i for i, n in enumerate(names) if n == name]
+        if len(idx) != 1:
+            return None
+        return pc.cast(batch.column(idx[0]), pa.string())
+
+    if system == "SIH-RD":
+        diag, proc = col("diag_princ"), col("proc_rea")
+        if diag is None or (proc is None and "proc_rea" in names):
+            return batch
+        mask = pc.match_substring_regex(diag, CID_REGEX.pattern, ignore_case=True)
+        if proc is not None:
+            mask = pc.or_kleene(mask, pc.starts_with(pc.utf8_trim_whitespace(proc), "0415"))
+    else:
+        proc = col("pa_proc_id")
+        if proc is None:
+            return batch
+        proc = pc.utf8_trim_whitespace(proc)
+        prefix = pc.utf8_slice_codeunits(pc.utf8_lpad(proc, 10, "0"), 0, 4)
+        regular = pc.match_substring_regex(proc, r"^\d{1,10}$")
+        mask = pc.or_kleene(pc.is_in(prefix, value_set=pa.array(_SIA_PROC_PREFIXES)), pc.invert(regular))
+    return batch.filter(pc.fill_null(mask, False))
+
+
 def _process_r_download_cache_python(system: str, uf: str, year: int, month: int) -> tuple[bool, str]:
     """
     Processa no Python um cache parquet gerado pelo R download-only.
     Mantém os mesmos filtros e metadados da ingestão Python nativa.
     """
+    import pyarrow as pa
+    from pyarrow import parquet as pq
+
     sistema = _system_to_label(system)
     dest = _dest_path(sistema, uf, year, month)
+    tmp_dest = _tmp_path(dest)
     cache = _download_cache_path(sistema, uf, year, month)
     if not cache.exists():
         return False, f"Cache de download não encontrado: {cache}"
@@ -694,20 +1220,26 @@ def _process_r_download_cache_python(system: str, uf: str, year: int, month: int
     try:
         pf = pq.ParquetFile(str(cache))
         for batch in pf.iter_batches(batch_size=CHUNK_SIZE):
-            df = batch.to_pandas()
-            df.columns = [_clean_name(c) for c in df.columns]
-            df = _coalesce_duplicate_columns(df)
+            # Só as linhas candidatas atravessam Arrow → pandas
+            batch = _arrow_prefilter(batch, system)
+            if batch.num_rows == 0:
+                continue
+            df = _clean_df(batch.to_pandas())
             df = filter_fn(df)
             if df.empty:
                 continue
             df = meta_fn(df, uf, year, month)
-            table = pa.Table.from_pandas(df, preserve_index=False)
             if schema is None:
-                schema = table.schema
-                writer = pq.ParquetWriter(str(dest), schema)
-            writer.write_table(table)
+                schema = _arrow_writer_schema(df, _meta_arrow_types())
+                writer = pq.ParquetWriter(str(tmp_dest), schema, **PARQUET_WRITER_OPTIONS)
+            table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+            writer.write_table(table, row_group_size=CHUNK_SIZE)
             n_written += len(df)
     except Exception as e:
+        if writer is not None:
+            writer.close()
+            writer = None
+        _discard_tmp(tmp_dest)
         return False, f"Processamento Python do cache R: {e}"
     finally:
         if writer is not None:
@@ -719,7 +1251,9 @@ def _process_r_download_cache_python(system: str, uf: str, year: int, month: int
             pass
 
     if schema is None or n_written == 0:
+        _discard_tmp(tmp_dest)
         return False, "Nenhum registro passou no filtro (cache R)."
+    os.replace(tmp_dest, dest)
     if not dest.exists():
         return False, "Parquet final não foi gravado após processamento do cache R."
     return True, ""
@@ -729,10 +1263,12 @@ def run_ingestion(
     from_log: bool = False,
     include_missing: bool = True,
     years: tuple[int, int] = YEARS_DEFAULT,
+    workers: int = INGEST_WORKERS,
 ) -> None:
     """
     Busca alvos por diff (ausentes em data/raw/); opcionalmente une com entradas do log.
     Baixa e processa em Python (FTP → DBC → DBF → chunks → Parquet). Progresso em tela; erros no log.
+    Até `workers` alvos em paralelo (workers=1 reproduz o modo sequencial).
     """
     targets = get_targets(from_log=from_log, include_missing=include_missing, years=years)
     if not targets:
@@ -756,26 +1292,20 @@ def run_ingestion(
     fail = 0
     skipped = 0
     consecutive_timeouts = 0
-    for i, (system, uf, year, month) in enumerate(targets, start=1):
-        if consecutive_timeouts >= CIRCUIT_BREAKER_THRESHOLD:
-            print(f"\n  Circuit breaker: {consecutive_timeouts} falhas por timeout; aguardando {CIRCUIT_BREAKER_COOLDOWN // 60} min...", flush=True)
-            log(QUEM, ONDE, f"Circuit breaker: aguardando {CIRCUIT_BREAKER_COOLDOWN}s após {consecutive_timeouts} timeouts.")
-            time.sleep(CIRCUIT_BREAKER_COOLDOWN)
-            consecutive_timeouts = 0
-        label = f"{system} {uf} {year} {month:02d}"
-        n_failures = _count_failures_in_log(system, uf, year, month)
-        if n_failures >= MAX_FAILURES_BEFORE_SKIP:
-            skipped += 1
-            log(QUEM, ONDE, f"IGNORADO (≥{MAX_FAILURES_BEFORE_SKIP} falhas no log): {label}")
-            print(f"  [{i}/{total}] ⏭️ {label} — ignorado ({n_failures} falhas no log).", flush=True)
-            continue
-        print(f"  [{i}/{total}] ⬇️ {label}...", flush=True)
-        success, err = _run_single(system, uf, year, month)
+    # Falhas anteriores por arquivo: uma leitura do log em vez de uma por alvo
+    failure_counts = _load_failure_counts()
+    # Downloads em paralelo (I/O de rede/disco libera o GIL); resultados tratados na thread principal.
+    pending: dict[Future, tuple[str, str, int, int, str]] = {}
+
+    def finish(fut: Future) -> None:
+        nonlocal ok, fail, consecutive_timeouts
+        system, uf, year, month, label = pending.pop(fut)
+        success, err = fut.result()
         dest = _dest_path(_system_to_label(system), uf, year, month)
         if success and dest.exists():
             ok += 1
             consecutive_timeouts = 0
-            log(QUEM, ONDE, f"SUCESSO ingestão: {label}")
+            log(QUEM, ONDE, "SUCESSO ingestão: %s", label)
             print(f"       ✅ {label}", flush=True)
         else:
             if success and not dest.exists():
@@ -785,8 +1315,35 @@ def run_ingestion(
                 consecutive_timeouts += 1
             else:
                 consecutive_timeouts = 0
-            log(QUEM, ONDE, f"ERRO ingestão {label}: {err[:200]}")
+            log(QUEM, ONDE, "ERRO ingestão %s: %s", label, err[:200])
             print(f"       ❌ {label} — ver logs/erros.log", flush=True)
+
+    def drain(max_pending: int) -> None:
+        while len(pending) > max_pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for fut in done:
+                finish(fut)
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for i, (system, uf, year, month) in enumerate(targets, start=1):
+            drain(workers - 1)  # libera um slot
+            if consecutive_timeouts >= CIRCUIT_BREAKER_THRESHOLD:
+                drain(0)  # não submete nada novo; espera os downloads em andamento
+                print(f"\n  Circuit breaker: {consecutive_timeouts} falhas por timeout; aguardando {CIRCUIT_BREAKER_COOLDOWN // 60} min...", flush=True)
+                log(QUEM, ONDE, f"Circuit breaker: aguardando {CIRCUIT_BREAKER_COOLDOWN}s após {consecutive_timeouts} timeouts.")
+                time.sleep(CIRCUIT_BREAKER_COOLDOWN)
+                consecutive_timeouts = 0
+            label = f"{system} {uf} {year} {month:02d}"
+            n_failures = failure_counts.get((system, uf.upper(), year, month), 0)
+            if n_failures >= MAX_FAILURES_BEFORE_SKIP:
+                skipped += 1
+                log(QUEM, ONDE, "IGNORADO (≥%d falhas no log): %s", MAX_FAILURES_BEFORE_SKIP, label)
+                print(f"  [{i}/{total}] ⏭️ {label} — ignorado ({n_failures} falhas no log).", flush=True)
+                continue
+            print(f"  [{i}/{total}] ⬇️ {label}...", flush=True)
+            fut = ex.submit(_run_single, system, uf, year, month)
+            pending[fut] = (system, uf, year, month, label)
+        drain(0)
     print(f"Concluído: {ok} processados, {fail} falhas, {skipped} ignorados (≥{MAX_FAILURES_BEFORE_SKIP} falhas no log).", flush=True)
     log(QUEM, ONDE, f"Concluído: {ok} processados, {fail} falhas, {skipped} ignorados.")
 
@@ -1,31 +1,136 @@
 # Formato de log: Quem | Quando | Onde | O que
 # Rastreabilidade: script (R ou Python), data do sistema, componente/caminho, mensagem.
 
+import atexit
+import multiprocessing.util
 import os
+import queue
+import threading
 from datetime import datetime
 from pathlib import Path
 
-# Diretório de logs (raiz do projeto)
+# Protege a criação do escritor (ingestão com workers em threads)
+_LOCK = threading.Lock()
+
+# Diretório de logs (raiz do projeto); caminho resolvido uma vez na importação
+_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
 def _project_root() -> Path:
-    p = Path(__file__).resolve().parent.parent.parent
-    return p
+    return _ROOT
+
+
+_LOG_DIR = _project_root() / "logs"
+_LOG_PATH = _LOG_DIR / "erros.log"
+_LOG_DIR_READY = False
 
 
 def _log_dir() -> Path:
-    d = _project_root() / "logs"
-    d.mkdir(parents=True, exist_ok=True)
-    return d
+    global _LOG_DIR_READY
+    if not _LOG_DIR_READY:  # mkdir só na primeira linha de log do processo
+        _LOG_DIR.mkdir(parents=True, exist_ok=True)
+        _LOG_DIR_READY = True
+    return _LOG_DIR
 
 
 def _log_file() -> Path:
-    return _log_dir() / "erros.log"
+    _log_dir()
+    return _LOG_PATH
+
+
+# Escrita assíncrona: log() só enfileira (quando, quem, onde, mensagem, args); uma thread por
+# processo formata e grava em lotes (um open/write por lote em vez de por linha).
+# Processos do transform têm a sua própria.
+_BATCH_LINES = 100
+_STOP = object()
+_QUEUE: queue.SimpleQueue | None = None
+_WRITER: threading.Thread | None = None
+_WRITER_PID: int | None = None
+
+
+def _write_lines(lines: list[str]) -> None:
+    try:
+        with open(_log_file(), "a", encoding="utf-8") as f:
+            f.write("".join(lines))
+    except OSError:
+        pass  # log nunca derruba o pipeline
+
+
+def _format(item: tuple) -> str:
+    quando, quem, onde, mensagem, args = item
+    if args:
+        try:
+            mensagem = mensagem % args
+        except (TypeError, ValueError):
+            mensagem = f"{mensagem} {args!r}"  # formato inválido não perde a linha
+    return f"{quando} | {quem} | {onde} | {mensagem}\n"
+
+
+def _writer_loop(q: queue.SimpleQueue) -> None:
+    while True:
+        item = q.get()
+        batch: list[str] = []
+        stop = False
+        while True:
+            if item is _STOP:
+                stop = True
+                break
+            batch.append(_format(item))
+            if len(batch) >= _BATCH_LINES:
+                break
+            try:
+                item = q.get_nowait()
+            except queue.Empty:
+                break
+        if batch:
+            _write_lines(batch)
+        if stop:
+            return
+
+
+def _queue() -> queue.SimpleQueue:
+    """Fila do processo atual; inicia a thread escritora na primeira chamada (e após fork)."""
+    global _QUEUE, _WRITER, _WRITER_PID
+    pid = os.getpid()
+    if _WRITER_PID == pid:
+        return _QUEUE
+    with _LOCK:
+        if _WRITER_PID != pid:
+            _QUEUE = queue.SimpleQueue()
+            _WRITER = threading.Thread(target=_writer_loop, args=(_QUEUE,), name="log_util-writer", daemon=True)
+            _WRITER.start()
+            _WRITER_PID = pid
+            # Processos filhos do multiprocessing saem sem atexit: descarrega via Finalize
+            multiprocessing.util.Finalize(None, flush, exitpriority=100)
+    return _QUEUE
+
+
+def flush() -> None:
+    """Grava as linhas pendentes e encerra a thread escritora (reiniciada no próximo log())."""
+    global _WRITER_PID
+    with _LOCK:
+        if _WRITER_PID != os.getpid() or _WRITER is None:
+            return
+        _QUEUE.put(_STOP)
+        _WRITER.join(timeout=10)
+        _WRITER_PID = None
+
+
+def _reset_after_fork() -> None:
+    global _LOCK, _WRITER_PID
+    _LOCK = threading.Lock()  # a thread que segurava o lock não existe no filho
+    _WRITER_PID = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+atexit.register(flush)
 
 
-def log(quem: str, onde: str, mensagem: str) -> None:
+def log(quem: str, onde: str, mensagem: str, *args: object) -> None:
     """Registra uma linha no logs/erros.log.
     Formato: quando (ISO) | quem | onde | mensagem
+    Com args, mensagem é formatada (estilo %, como logging) só na thread escritora, fora de quem
+    chama: log(QUEM, ONDE, "ok: %s", label). Os args são lidos na gravação: não os altere depois.
+    A gravação é assíncrona (lotes); use flush() antes de ler o arquivo no mesmo processo.
     """
-    quando = datetime.now().isoformat()
-    linha = f"{quando} | {quem} | {onde} | {mensagem}"
-    with open(_log_file(), "a", encoding="utf-8") as f:
-        f.write(linha + "\n")
+    _queue().put((datetime.now().isoformat(), quem, onde, mensagem, args))
@@ -1,7 +1,7 @@
 """
 Transformação: lê Parquets de data/raw/ (particionado por ano, UF, sistema),
 aplica o pipeline de transformações e grava em data/processed/.
-Um arquivo por vez para controle de memória (ex.: 16 GB RAM).
+Um arquivo por vez, lido em lotes, para controle de memória (ex.: 16 GB RAM).
 
 data/raw/ é a fonte da verdade; data/processed/ é camada derivada.
 Os arquivos permanecem em raw — não são removidos. Qualquer reprocessamento
@@ -13,19 +13,40 @@ Vantagens: fonte única de verdade (filesystem), idempotente, resistente a rota
 
 Para adicionar nova transformação ou métrica:
   1. Crie uma função (df: pd.DataFrame) -> pd.DataFrame que receba e retorne o DataFrame.
+     O df é exclusivo do pipeline (criado em _coalesce_duplicate_columns): atribua colunas nele, sem df.copy().
   2. Adicione-a à lista TRANSFORM_STEPS abaixo (ordem importa).
+  3. Se ela ler colunas de raw fora do dicionário enxuto, inclua-as em STEP_INPUT_COLUMNS
+     (só essas colunas são lidas do Parquet).
 """
 
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import functools
+import json
+import os
 from pathlib import Path
 import re
-from typing import Callable
+import string
+from typing import Callable, Iterable, Iterator
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
 from .log_util import log
 
+# Copy-on-Write (padrão a partir do pandas 3): os passos atribuem colunas no df sem .copy() defensivo
+if int(pd.__version__.split(".", 1)[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+# Resolvida uma vez na importação (resolve() consulta o sistema de arquivos)
+_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
 def _root() -> Path:
-    return Path(__file__).resolve().parent.parent.parent
+    return _ROOT
 
 
 RAW_BASE = _root() / "data" / "raw"
@@ -34,6 +55,19 @@ PROCESSED_BASE = _root() / "data" / "processed"
 QUEM = "Python"
 ONDE_BASE = "transform"
 
+# Linhas por lote lido de raw (iter_batches): limita o pico de memória por arquivo
+TRANSFORM_BATCH_ROWS = 200_000
+# Escrita em processed (camada consultada pelo DuckDB): Snappy decodifica mais rápido que zstd;
+# raw, que é o arquivo frio, continua em zstd-3 (ingestion.PARQUET_WRITER_OPTIONS).
+# Row groups grandes: menos fronteiras/metadados por scan, estatísticas por grupo para pruning.
+PARQUET_WRITER_OPTIONS = dict(
+    compression="snappy",
+    use_dictionary=True,
+    data_page_size=1 << 20,
+    write_statistics=True,
+)
+ROW_GROUP_ROWS = 1_000_000
+
 
 def _is_temporary_parquet_artifact(path: Path) -> bool:
     """
@@ -54,6 +88,21 @@ def _processed_path_for_raw(raw_path: Path) -> Path:
     rel = raw_path.relative_to(RAW_BASE)
     return PROCESSED_BASE / rel
 
+
+def _collect_parquets(root: Path) -> set[str]:
+    """Caminhos (relativos a root) dos .parquet da árvore, sem artefatos temporários; uma só varredura."""
+    found: set[str] = set()
+    if not root.is_dir():
+        return found
+    base = str(root)
+    for dirpath, _dirnames, filenames in os.walk(base):
+        rel_dir = os.path.relpath(dirpath, base)
+        for name in filenames:
+            if not name.endswith(".parquet") or _is_temporary_parquet_artifact(Path(name)):
+                continue
+            found.add(name if rel_dir == "." else os.path.join(rel_dir, name))
+    return found
+
 # Faixas de idade (provisório). TODO: basear em artigo de referência para categorização.
 IDADE_GRUPOS = [
     (0, 17, "0-17"),
@@ -95,6 +144,14 @@ SIH_COMPACT_COLUMNS = [
 
 DERIVED_COLUMNS = ["custo_total", "idade_grupo", "cid_capitulo", "ano_mes"]
 
+# Colunas de raw lidas pelos passos do pipeline mas fora do dicionário enxuto (nome canônico).
+# Colunas com "val" no nome também são lidas (fallback de _add_custo_total).
+STEP_INPUT_COLUMNS = [
+    "valor", "valor_total", "pa_valtot", "pa_val_ap",  # _add_custo_total
+    "nu_idade", "idade_anos",  # _add_idade_grupo
+    "cid",  # _add_cid_capitulo
+]
+
 
 # Aliases históricos/heterogêneos (após normalização do nome)
 ALIAS_TO_CANONICAL = {
@@ -117,42 +174,56 @@ ALIAS_TO_CANONICAL = {
 }
 
 
+_CAMEL_RE = re.compile(r"([a-z0-9])([A-Z])")
+# "_" também é não-alfanumérico: cada sequência (inclusive "__") já vira um único "_"
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+# Arquivos de um mesmo sistema repetem os mesmos nomes de coluna: normaliza cada nome uma vez por processo
+@functools.lru_cache(maxsize=4096)
 def _normalize_col_name(name: str) -> str:
     """Normaliza nome para snake_case estável, incluindo camelCase histórico."""
-    s = str(name).strip()
-    s = re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", s)
-    s = s.lower()
-    s = re.sub(r"[^a-z0-9]+", "_", s)
-    s = re.sub(r"_+", "_", s).strip("_")
+    s = _CAMEL_RE.sub(r"\1_\2", str(name).strip()).lower()
+    s = _NON_ALNUM_RE.sub("_", s).strip("_")
     return ALIAS_TO_CANONICAL.get(s, s)
 
 
-def _coalesce_duplicate_columns(df: pd.DataFrame) -> pd.DataFrame:
+def _coalesce_duplicate_columns(batch: pa.RecordBatch) -> pd.DataFrame:
     """
-    Coalesce de colunas por nome canônico:
+    Coalesce de colunas por nome canônico, ainda no Arrow (antes de ir para pandas):
     - normaliza nomes (maiúsc/minúsc/camelCase),
     - agrupa colisões,
     - mantém o primeiro valor não-nulo por linha.
+    Retorna o DataFrame (tipos ArrowDtype) que entra em TRANSFORM_STEPS.
     """
-    if df.empty:
-        return df
-    canonical = [_normalize_col_name(c) for c in df.columns]
     groups: dict[str, list[int]] = {}
-    for idx, col in enumerate(canonical):
-        groups.setdefault(col, []).append(idx)
+    for idx, name in enumerate(batch.schema.names):
+        groups.setdefault(_normalize_col_name(name), []).append(idx)
 
-    out: dict[str, pd.Series] = {}
+    arrays: list[pa.Array] = []
+    mixed: dict[str, list[int]] = {}
     for col, idxs in groups.items():
-        if len(idxs) == 1:
-            out[col] = df.iloc[:, idxs[0]]
+        cols = [batch.column(i) for i in idxs]
+        if len(cols) == 1:
+            arrays.append(cols[0])
+        elif all(c.type == cols[0].type for c in cols[1:]):
+            # Mesmo tipo: kernel coalesce do Arrow, sem montar o bloco nem bfill linha a linha
+            arrays.append(pc.coalesce(*cols))
         else:
-            block = df.iloc[:, idxs]
-            out[col] = block.bfill(axis=1).iloc[:, 0]
-    return pd.DataFrame(out)
+            # Tipos diferentes entre aliases (ex.: string vs int64): resolvido em pandas abaixo
+            mixed[col] = idxs
+            arrays.append(cols[0])
+    df = pa.RecordBatch.from_arrays(arrays, names=list(groups)).to_pandas(types_mapper=pd.ArrowDtype)
+    for col, idxs in mixed.items():
+        # bfill aceita a mistura de tipos (resultado object)
+        block = pd.concat([batch.column(i).to_pandas(types_mapper=pd.ArrowDtype) for i in idxs], axis=1)
+        df[col] = block.bfill(axis=1).iloc[:, 0]
+    return df
 
 
-def _project_compact_dictionary(df: pd.DataFrame, sistema: str) -> pd.DataFrame:
-    """Projeta para dicionário enxuto/coeso por sistema, preservando derivadas."""
+@functools.lru_cache(maxsize=None)
+def _compact_columns(sistema: str) -> tuple[str, ...]:
+    """Colunas de saída (dicionário enxuto + derivadas) do sistema, na ordem de gravação."""
     target = list(COMMON_COLUMNS)
     if sistema == "SIA":
         target.extend(SIA_COMPACT_COLUMNS)
@@ -161,14 +232,83 @@ def _project_compact_dictionary(df: pd.DataFrame, sistema: str) -> pd.DataFrame:
     target.extend(DERIVED_COLUMNS)
 
     # Remover duplicatas mantendo ordem
-    target = list(dict.fromkeys(target))
-    keep = [c for c in target if c in df.columns]
-    return df.loc[:, keep].copy()
+    return tuple(dict.fromkeys(target))
+
+
+def _read_columns(names: list[str], sistema: str) -> list[str]:
+    """
+    Colunas de raw que precisam ser lidas: as que, normalizadas, caem no dicionário enxuto
+    ou são entrada de algum passo. As demais seriam descartadas na projeção final.
+    """
+    wanted = set(_compact_columns(sistema)).union(STEP_INPUT_COLUMNS)
+    out = []
+    for name in names:
+        canon = _normalize_col_name(name)
+        if canon in wanted or "val" in canon:
+            out.append(name)
+    return out
+
+
+def _project_compact_dictionary(df: pd.DataFrame, sistema: str) -> pd.DataFrame:
+    """Projeta para dicionário enxuto/coeso por sistema, preservando derivadas."""
+    keep = [c for c in _compact_columns(sistema) if c in df.columns]
+    return df.loc[:, keep]
+
+
+def _arrow_cast_numeric(arr: pa.Array) -> pa.Array | None:
+    """float64 do texto após trim ("" → nulo); None se algum valor não for número para o Arrow."""
+    arr = pc.utf8_trim_whitespace(arr)
+    arr = pc.if_else(pc.equal(arr, ""), pa.scalar(None, pa.string()), arr)
+    try:
+        return pc.cast(arr, pa.float64())
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return None
 
 
 def _ensure_numeric(series: pd.Series) -> pd.Series:
-    """Converte para numérico, coercendo erros para NaN. Passa por string para evitar edge cases (Arrow/object)."""
-    return pd.to_numeric(series.astype(str), errors="coerce")
+    """
+    Converte para numérico, coercendo erros para NaN. Colunas já numéricas (comum com tipos Arrow)
+    voltam como estão. Texto vira sempre float64, inteiro ou não, com ou sem nulos: o tipo não
+    depende do conteúdo do lote (lotes e arquivos de um mesmo sistema gravam o mesmo schema).
+    """
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_string_dtype(series.dtype) and not isinstance(series.dtype, pd.StringDtype):
+        # Texto Arrow/object: cast do Arrow (parser em C++) quando a coluna inteira é numérica após
+        # trim e "" → nulo; qualquer valor não numérico (ou hexadecimal) cai no to_numeric abaixo.
+        out = _arrow_cast_numeric(_arrow_strings(series))
+        if out is not None:
+            return pd.Series(out.to_numpy(zero_copy_only=False), index=series.index, name=series.name,
+                             dtype="float64")
+    try:
+        out = pd.to_numeric(series, errors="coerce")
+    except (TypeError, ValueError):
+        out = pd.to_numeric(series.astype(str), errors="coerce")
+    # float64 NumPy (NaN vira nulo ao gravar), também para resultados Arrow/mascarados
+    return pd.Series(out.to_numpy(dtype="float64", na_value=np.nan), index=series.index, name=series.name)
+
+
+def _is_value_column(col: str) -> bool:
+    """Coluna de valor em R$ (VALUE_COLUMNS ou val_*)."""
+    return col in VALUE_COLUMNS or col.startswith("val_")
+
+
+def _ensure_float(series: pd.Series) -> pd.Series:
+    """Como _ensure_numeric, mas sempre float64 (inclusive coluna int64 de raw)."""
+    out = _ensure_numeric(series)
+    if isinstance(out.dtype, pd.ArrowDtype):
+        if pa.types.is_float64(out.dtype.pyarrow_dtype):
+            return out
+        return out.astype(pd.ArrowDtype(pa.float64()))
+    if out.dtype == np.float64:
+        return out
+    return pd.Series(out.to_numpy(dtype="float64", na_value=np.nan), index=out.index, name=out.name)
+
+
+_CUSTO_CANDIDATES = (
+    "pa_valpro", "pa_valapr", "nu_vpa_tot", "nu_pa_tot",  # SIA
+    "valor", "val_tot", "valor_total", "pa_valtot", "pa_val_ap",  # SIH / alternativos
+)
 
 
 def _add_custo_total(df: pd.DataFrame) -> pd.DataFrame:
@@ -177,31 +317,39 @@ def _add_custo_total(df: pd.DataFrame) -> pd.DataFrame:
     SIA e SIH usam nomes diferentes; escolhemos a coluna apropriada e expomos como custo_total.
     SIA: pa_valpro, pa_valapr, nu_vpa_tot, nu_pa_tot. SIH: valor, val_tot, valor_total.
     """
-    cand = [
-        "pa_valpro", "pa_valapr", "nu_vpa_tot", "nu_pa_tot",  # SIA
-        "valor", "val_tot", "valor_total", "pa_valtot", "pa_val_ap",  # SIH / alternativos
-    ]
-    for c in cand:
+    for c in _CUSTO_CANDIDATES:
         if c in df.columns:
-            df = df.copy()
-            df["custo_total"] = _ensure_numeric(df[c])
+            df["custo_total"] = _ensure_float(df[c])
             return df
-    for c in df.columns:
-        if "val" in c.lower() and str(df[c].dtype) in ("object", "string", "float64", "int64", "Int64"):
-            df = df.copy()
-            df["custo_total"] = _ensure_numeric(df[c])
+    # Fallback: primeira coluna com "val" no nome (nomes já normalizados em minúsculas) com tipo
+    # numérico ou texto, inclusive tipos Arrow
+    dtypes = df.dtypes
+    for c, dtype in dtypes.items():
+        if "val" in c and _is_value_dtype(dtype):
+            df["custo_total"] = _ensure_float(df[c])
             return df
-    df = df.copy()
-    df["custo_total"] = pd.NA
+    df["custo_total"] = np.nan  # float64 como nos demais casos (coluna toda nula)
     return df
 
 
+def _is_value_dtype(dtype) -> bool:
+    """Numérico (não bool) ou texto: colunas que _ensure_numeric sabe converter em valor."""
+    if pd.api.types.is_bool_dtype(dtype):
+        return False
+    return pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_string_dtype(dtype)
+
+
+# IDADE_GRUPOS em arrays (faixas ordenadas e disjuntas); rótulos + "outro" + None (nulo)
+_IDADE_LO = np.array([lo for lo, _, _ in IDADE_GRUPOS], dtype="float64")
+_IDADE_HI = np.array([hi for _, hi, _ in IDADE_GRUPOS], dtype="float64")
+_IDADE_LABELS = np.array([label for _, _, label in IDADE_GRUPOS] + ["outro", None], dtype=object)
+
+
 def _add_idade_grupo(df: pd.DataFrame) -> pd.DataFrame:
     """
     Coluna derivada idade_grupo a partir de coluna de idade (em anos).
     Procura: idade, nu_idade, idade_anos, etc.
     """
-    df = df.copy()
     idade_col = None
     for c in ["idade", "nu_idade", "idade_anos", "pa_idade"]:
         if c in df.columns:
@@ -210,35 +358,45 @@ def _add_idade_grupo(df: pd.DataFrame) -> pd.DataFrame:
     if idade_col is None:
         df["idade_grupo"] = None
         return df
-    s = _ensure_numeric(df[idade_col])
-    def classificar(v):
-        if pd.isna(v):
-            return None
-        v = int(v)
-        for lo, hi, label in IDADE_GRUPOS:
-            if lo <= v <= hi:
-                return label
-        return "outro"
-    df["idade_grupo"] = s.map(classificar)
+    # Vetorizado: trunca para anos inteiros (como int(v)) e acha a faixa por busca binária
+    # (uma passada, como pd.cut), mantendo "outro" para idades fora das faixas e None para nulos
+    v = np.trunc(_ensure_numeric(df[idade_col]).to_numpy(dtype="float64", na_value=np.nan))
+    idx = np.searchsorted(_IDADE_HI, v, side="left")
+    inside = idx < len(IDADE_GRUPOS)
+    idx_in = np.where(inside, idx, 0)
+    code = np.where(inside & (v >= _IDADE_LO[idx_in]), idx_in, len(IDADE_GRUPOS))
+    code[np.isnan(v)] = len(IDADE_GRUPOS) + 1
+    df["idade_grupo"] = _IDADE_LABELS[code]
     return df
 
 
+_CID_CAPITULO_CHARS = pa.array(list(string.ascii_uppercase + string.digits), type=pa.string())
+
+
+def _arrow_strings(s: pd.Series) -> pa.Array:
+    """Coluna como array de string do Arrow (demais tipos, inclusive object misto, via str(); nulos ficam nulos)."""
+    dtype = s.dtype
+    is_arrow_str = isinstance(dtype, pd.ArrowDtype) and (
+        pa.types.is_string(dtype.pyarrow_dtype) or pa.types.is_large_string(dtype.pyarrow_dtype)
+    )
+    if not (is_arrow_str or isinstance(dtype, pd.StringDtype)):
+        s = s.astype("string")
+    return pa.array(s, type=pa.string(), from_pandas=True)
+
+
 def _add_cid_capitulo(df: pd.DataFrame) -> pd.DataFrame:
     """
     Coluna derivada cid_capitulo: primeiro caractere do CID (capítulo CID-10).
     Grupos clínicos (icd_group) são definidos no pipeline (ingest/transform) e devem
     ser referenciados no dicionário de dados/documentação do projeto.
     """
-    df = df.copy()
     for c in ["main_icd", "diag_princ", "pa_cidpri", "cid"]:
         if c in df.columns:
-            s = df[c].astype(str).str.strip()
-            first = s.str[:1]
-            # Só mantém se for letra (capítulo CID-10) ou dígito; senão None
-            df["cid_capitulo"] = first.where(
-                first.str.match(r"[A-ZU0-9]", na=False),
-                None
-            )
+            first = pc.utf8_slice_codeunits(pc.utf8_trim_whitespace(_arrow_strings(df[c])), 0, 1)
+            # Só mantém se for letra maiúscula (capítulo CID-10) ou dígito; senão None.
+            # is_in do Arrow num conjunto fixo em vez de um regex por linha.
+            first = pc.if_else(pc.is_in(first, value_set=_CID_CAPITULO_CHARS), first, None)
+            df["cid_capitulo"] = first.to_pandas().set_axis(df.index)
             return df
     df["cid_capitulo"] = None
     return df
@@ -253,34 +411,46 @@ NUMERIC_COLUMNS = [
     "mun_res_lat", "mun_res_lon", "mun_res_alt", "mun_res_area",
 ]
 
+# Colunas de valor (R$): sempre float64, inclusive quando raw traz int64 (arquivo só com valores
+# inteiros) — senão o tipo mudaria entre arquivos e o DuckDB truncaria os centavos na leitura.
+# Além destas, toda coluna val_* (SIH).
+VALUE_COLUMNS = [
+    "custo_total",
+    "pa_valpro", "pa_valapr", "nu_vpa_tot", "pa_vl_cf", "pa_vl_cl", "pa_vl_inc", "pa_dif_val",
+    "valor", "valor_total",
+]
+
 # Colunas de UF: padronizar para 2 letras maiúsculas
 UF_COLUMNS = ["uf_origem", "pa_ufmun", "pa_ufdif", "mun_res_uf"]
 
 
 def _standardize_numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """Converte colunas conhecidas de valor/quantidade para numérico."""
-    df = df.copy()
-    for col in NUMERIC_COLUMNS:
-        if col in df.columns and df[col].dtype == "object":
-            df[col] = _ensure_numeric(df[col])
+    """Converte colunas conhecidas de valor/quantidade para numérico; colunas de valor para float64."""
+    dtypes = df.dtypes
+    cols = [col for col in NUMERIC_COLUMNS if col in dtypes.index and dtypes[col] == "object"]
+    for col in cols:
+        df[col] = _ensure_numeric(df[col])
+    for col in dtypes.index:
+        if _is_value_column(col) and _is_value_dtype(df[col].dtype):
+            df[col] = _ensure_float(df[col])
     return df
 
 
 def _standardize_uf_columns(df: pd.DataFrame) -> pd.DataFrame:
     """Padroniza colunas de UF para 2 letras maiúsculas."""
-    df = df.copy()
     for col in UF_COLUMNS:
         if col not in df.columns:
             continue
-        s = df[col].astype(str).str.strip().str.upper()
-        # Mantém só os 2 primeiros caracteres se for código (ex.: "12" ou "AC")
-        df[col] = s.str[:2].replace("NA", "").replace("NAN", "")
+        # Kernels de string do Arrow (C++) em vez de strip/upper/slice/replace do pandas.
+        # Mantém só os 2 primeiros caracteres se for código (ex.: "12" ou "AC"); "NA"/"NaN" viram ""
+        arr = pc.utf8_slice_codeunits(pc.utf8_upper(pc.utf8_trim_whitespace(_arrow_strings(df[col]))), 0, 2)
+        arr = pc.if_else(pc.equal(arr, "NA"), "", arr)
+        df[col] = arr.to_pandas().set_axis(df.index)
     return df
 
 
 def _add_data_competencia(df: pd.DataFrame) -> pd.DataFrame:
     """Coluna derivada ano_mes (YYYYMM) para ordenação/filtro por competência."""
-    df = df.copy()
     ano = df.get("ano_cmpt")
     mes = df.get("mes_cmpt")
     if ano is not None and mes is not None:
@@ -290,14 +460,75 @@ def _add_data_competencia(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+_NULL_LITERALS = pa.array(["nan", "None"], type=pa.string())
+
+
 def _standardize_types(df: pd.DataFrame) -> pd.DataFrame:
-    """Padroniza tipos: strings trim; numéricos e UFs nas funções dedicadas."""
-    df = df.copy()
-    for col in df.columns:
-        if col in ("custo_total", "idade_grupo", "cid_capitulo", "ano_mes"):
+    """
+    Padroniza tipos: strings trim; numéricos e UFs nas funções dedicadas.
+    Com a leitura em tipos Arrow, só pega colunas object/string criadas no pipeline (ex.: aliases
+    de tipos diferentes resolvidos por bfill): além do trim, deixa-as em string, gravável no Parquet.
+    """
+    cols = [
+        col for col, dtype in df.dtypes.items()
+        if col not in DERIVED_COLUMNS and (dtype == "object" or str(dtype) == "string")
+    ]
+    for col in cols:
+        # Trim e máscara em kernels do Arrow, resultado em string[pyarrow] (buffer UTF-8 contíguo):
+        # nulos e literais "nan"/"None" viram "" (como o astype(str) + replace original: filtro = '' os pega)
+        arr = pc.utf8_trim_whitespace(_arrow_strings(df[col]))
+        arr = pc.fill_null(pc.if_else(pc.is_in(arr, value_set=_NULL_LITERALS), "", arr), "")
+        df[col] = pd.Series(pd.arrays.ArrowStringArray(arr), index=df.index)
+    return df
+
+
+# Inteiros com faixa conhecida e o tipo fixo de cada um em processed (menos bytes que int64).
+# Tipo sempre o mesmo, em todo lote e arquivo: valor fora da faixa ou não inteiro vira nulo,
+# contado por coluna e registrado no log do arquivo (transform_single_file).
+DOWNCAST_INT_COLUMNS = {
+    "idade": pa.uint8(),
+    "ano_cmpt": pa.uint16(), "mes_cmpt": pa.uint8(), "ano_mes": pa.uint32(),
+    "pa_qtdpro": pa.uint32(), "pa_qtdapr": pa.uint32(), "qt_diarias": pa.uint16(), "dias_perm": pa.uint16(),
+}
+
+
+DICTIONARY_COLUMNS = [
+    "uf_origem", "sistema", "pa_sexo", "sexo", "mun_res_uf",
+    "idade_grupo", "cid_capitulo", "pa_grupo", "pa_subgru",
+]
+
+
+def _dictionary_encode(table: pa.Table) -> pa.Table:
+    """Codifica DICTIONARY_COLUMNS presentes como dicionário (tipo fixo entre lotes e arquivos)."""
+    for col in DICTIONARY_COLUMNS:
+        idx = table.schema.get_field_index(col)
+        if idx < 0:
             continue
-        if df[col].dtype == "object" or str(df[col].dtype) == "string":
-            df[col] = df[col].astype(str).str.strip().replace("nan", "").replace("None", "")
+        arr = table.column(idx)
+        if not pa.types.is_dictionary(arr.type):
+            arr = pc.dictionary_encode(pc.cast(arr, pa.string()))
+        table = table.set_column(idx, col, arr)
+    return table
+
+
+def _downcast_integers(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte DOWNCAST_INT_COLUMNS presentes para o tipo fixo de cada uma (ArrowDtype), qualquer
+    que seja o tipo de entrada; valores fora da faixa do tipo ou não inteiros viram nulo.
+    Quantos valores foram anulados, por coluna, fica em df.attrs["downcast_nulled"].
+    """
+    for col, target in DOWNCAST_INT_COLUMNS.items():
+        if col not in df.columns:
+            continue
+        v = _ensure_numeric(df[col]).to_numpy(dtype="float64", na_value=np.nan)
+        info = np.iinfo(target.to_pandas_dtype())
+        ok = (v >= info.min) & (v <= info.max) & (v == np.trunc(v))  # NaN → False
+        lost = int(np.count_nonzero(~ok & ~np.isnan(v)))
+        if lost:
+            nulled = df.attrs.setdefault("downcast_nulled", {})
+            nulled[col] = nulled.get(col, 0) + lost
+        arr = pa.array(np.where(ok, v, 0).astype(target.to_pandas_dtype()), mask=~ok)
+        df[col] = pd.Series(pd.arrays.ArrowExtensionArray(arr), index=df.index)
     return df
 
 
@@ -311,82 +542,235 @@ TRANSFORM_STEPS: list[Callable[[pd.DataFrame], pd.DataFrame]] = [
     _standardize_numeric_columns,
     _standardize_uf_columns,
     _standardize_types,
+    _downcast_integers,
 ]
 
 
+# .../ano=X/uf=Y/sistema=Z/arquivo.parquet (caminho em as_posix: separador "/" em qualquer SO)
+_PARTITION_RE = re.compile(r"(?:^|/)ano=([^/]+)/uf=([^/]+)/sistema=([^/]+)/[^/]+\.parquet$")
+
+
+def _partition_of(raw_path: Path) -> tuple[str | None, str | None, str | None]:
+    """(ano, uf, sistema) dos diretórios ano=/uf=/sistema= imediatamente acima do arquivo."""
+    m = _PARTITION_RE.search(raw_path.as_posix())
+    if m is None:
+        return None, None, None
+    return m.group(1), m.group(2), m.group(3)
+
+
 def transform_single_file(raw_path: Path) -> Path | None:
     """
     Lê o Parquet em raw_path, aplica o pipeline de transformações e grava em
     data/processed/ (mesma estrutura de partições). O arquivo em raw permanece (fonte da verdade).
     Retorna o path de destino ou None em caso de erro.
     """
-    # Inferir partições a partir do caminho: .../ano=X/uf=Y/sistema=Z/arquivo.parquet
-    parts = raw_path.parts
-    ano = uf = sistema = None
-    for p in parts:
-        if p.startswith("ano="):
-            ano = p.split("=", 1)[1]
-        elif p.startswith("uf="):
-            uf = p.split("=", 1)[1]
-        elif p.startswith("sistema="):
-            sistema = p.split("=", 1)[1]
+    # Inferir partições a partir do caminho: .../ano=X/uf=Y/sistema=Z/arquivo.parquet (um regex só)
+    ano, uf, sistema = _partition_of(raw_path)
     if not (ano and uf and sistema):
         log(QUEM, ONDE_BASE, f"ERRO: path sem partições esperadas: {raw_path}")
         return None
 
     try:
-        # dtype_backend='pyarrow' mantém tipos Arrow e tende a ser mais rápido que a conversão para StringDtype
-        try:
-            df = pd.read_parquet(raw_path, dtype_backend="pyarrow")
-        except (TypeError, ValueError):
-            df = pd.read_parquet(raw_path)
+        # memory_map: páginas lidas direto do mapeamento do arquivo, sem cópia num buffer de leitura;
+        # pre_buffer: lê de uma vez os column chunks de cada row group (menos leituras pequenas)
+        pf = pq.ParquetFile(raw_path, memory_map=True, pre_buffer=True)
     except Exception as e:
         log(QUEM, str(raw_path), f"ERRO ao ler Parquet: {e}")
         return None
 
-    # Passo 0: padronização canônica de schema para mitigar variação de arquivos.
-    df = _coalesce_duplicate_columns(df)
-
-    if df.empty:
-        pass  # grava vazio; sem log para não poluir
-    else:
-        for step in TRANSFORM_STEPS:
-            df = step(df)
-        df = _project_compact_dictionary(df, sistema=sistema)
+    # Só as colunas usadas (dicionário enxuto + entradas dos passos): as demais nem são descomprimidas
+    columns = _read_columns(pf.schema_arrow.names, sistema)
 
     dest_dir = PROCESSED_BASE / f"ano={ano}" / f"uf={uf}" / f"sistema={sistema}"
     dest_dir.mkdir(parents=True, exist_ok=True)
     dest_path = dest_dir / raw_path.name  # mesmo nome que em raw (estrutura espelhada)
 
+    # Grava em *.parquet.tmp (ignorado no diff raw vs processed) e troca atomicamente: um arquivo
+    # parcial de uma execução interrompida nunca conta como "já processado"
+    tmp_path = dest_path.with_name(dest_path.name + ".tmp")
+    nulled: dict[str, int] = {}
     try:
-        df.to_parquet(dest_path, index=False)
+        _write_batches(_transformed_batches(pf, columns, sistema, nulled), tmp_path)
+        os.replace(tmp_path, dest_path)
+        if nulled:
+            lost = ", ".join(f"{col}={n}" for col, n in sorted(nulled.items()))
+            log(QUEM, str(raw_path), f"AVISO: valores fora da faixa ou não inteiros gravados como nulo: {lost}")
         return dest_path
+    except _TransformError as e:
+        log(QUEM, str(raw_path), f"ERRO ao transformar: {e.__cause__}")
     except Exception as e:
         log(QUEM, str(dest_path), f"ERRO ao gravar: {e}")
-        return None
+    try:
+        tmp_path.unlink()
+    except FileNotFoundError:
+        pass
+    return None
+
+
+class _TransformError(Exception):
+    """Falha no pipeline (não na gravação); a causa original fica em __cause__."""
+
+
+def _transformed_batches(
+    pf: pq.ParquetFile, columns: list[str], sistema: str, nulled: dict[str, int]
+) -> Iterator[pa.Table]:
+    """
+    Lotes de raw já transformados, como pa.Table. Só um lote em pandas por vez (pico de memória
+    ~ lote, não ~ arquivo); tipos Arrow (ArrowDtype) como no antigo read_parquet(dtype_backend="pyarrow").
+    Arquivo sem linhas gera um lote vazio, para que o vazio também tenha o schema de processed.
+    nulled acumula, por coluna, os valores anulados por _downcast_integers no arquivo.
+    """
+    try:
+        n = 0
+        for rb in pf.iter_batches(batch_size=TRANSFORM_BATCH_ROWS, columns=columns):
+            n += 1
+            yield _transform_batch(rb, sistema, nulled)
+        if n == 0:
+            schema = pa.schema([pf.schema_arrow.field(name) for name in columns])
+            yield _transform_batch(pa.RecordBatch.from_pylist([], schema=schema), sistema, nulled)
+    except Exception as e:
+        raise _TransformError() from e
+
+
+def _transform_batch(rb: pa.RecordBatch, sistema: str, nulled: dict[str, int]) -> pa.Table:
+    # Passo 0: padronização canônica de schema para mitigar variação de arquivos.
+    df = _coalesce_duplicate_columns(rb)
+    for step in TRANSFORM_STEPS:
+        df = step(df)
+    for col, n in df.attrs.get("downcast_nulled", {}).items():
+        nulled[col] = nulled.get(col, 0) + n
+    df = _project_compact_dictionary(df, sistema=sistema)
+    return _dictionary_encode(pa.Table.from_pandas(df, preserve_index=False))
+
+
+def _output_schema(table: pa.Table) -> pa.Schema:
+    """
+    Schema fixo do arquivo, tirado do primeiro lote: os tipos de processed são declarados no
+    pipeline (valores float64, DOWNCAST_INT_COLUMNS, DICTIONARY_COLUMNS) ou vêm do tipo da coluna
+    em raw; coluna só-nula no primeiro lote fica string (como em ingestion._arrow_writer_schema).
+    """
+    nulls = {f.name for f in table.schema if pa.types.is_null(f.type)}
+    if not nulls:
+        return table.schema
+    fields = [pa.field(f.name, pa.string()) if f.name in nulls else f for f in table.schema]
+    metadata = dict(table.schema.metadata or {})
+    if b"pandas" in metadata:
+        # Metadados do pandas descrevem o dtype de cada coluna na leitura: string, não null[pyarrow]
+        meta = json.loads(metadata[b"pandas"])
+        for col in meta.get("columns", []):
+            if col.get("name") in nulls:
+                col.update(pandas_type="unicode", numpy_type="object")
+        metadata[b"pandas"] = json.dumps(meta).encode()
+    return pa.schema(fields, metadata=metadata)
+
+
+def _align_to_schema(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    """
+    table convertida para schema (coluna ausente vira nula). Levanta ValueError se uma coluna não
+    existir no schema ou não puder ser convertida sem perda (cast seguro do Arrow).
+    """
+    if table.schema.equals(schema, check_metadata=False):
+        return table
+    names = set(schema.names)
+    extra = [name for name in table.schema.names if name not in names]
+    if extra:
+        raise ValueError(f"colunas fora do schema do arquivo: {extra}")
+    present = set(table.schema.names)
+    arrays = []
+    for f in schema:
+        if f.name not in present:
+            arrays.append(pa.nulls(table.num_rows, f.type))
+            continue
+        col = table.column(f.name)
+        try:
+            arrays.append(col if col.type == f.type else col.cast(f.type))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            raise ValueError(f"coluna {f.name}: {col.type} não converte para {f.type} do schema do arquivo ({e})") from e
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _write_batches(batches: Iterable[pa.Table], tmp_path: Path) -> int:
+    """
+    Grava os lotes num Parquet sem montar o arquivo inteiro em memória: row groups de até
+    ROW_GROUP_ROWS linhas, no schema fixado pelo primeiro lote (_output_schema). Lotes seguintes
+    são convertidos para ele; se um lote não couber (conflito real de tipos), levanta ValueError
+    e o arquivo falha — nada é relido nem acumulado além de um row group.
+    Retorna o número de lotes.
+    """
+    writer: pq.ParquetWriter | None = None
+    schema: pa.Schema | None = None
+    buffered: list[pa.Table] = []
+    buffered_rows = 0
+    n = 0
+    try:
+        for table in batches:
+            n += 1
+            if schema is None:
+                schema = _output_schema(table)
+                writer = pq.ParquetWriter(str(tmp_path), schema, **PARQUET_WRITER_OPTIONS)
+            table = _align_to_schema(table, schema)
+            buffered.append(table)
+            buffered_rows += table.num_rows
+            if buffered_rows >= ROW_GROUP_ROWS:
+                writer.write_table(pa.concat_tables(buffered), row_group_size=ROW_GROUP_ROWS)
+                buffered, buffered_rows = [], 0
+        if writer is not None and buffered:
+            writer.write_table(pa.concat_tables(buffered), row_group_size=ROW_GROUP_ROWS)
     finally:
-        del df
+        if writer is not None:
+            writer.close()
+    return n
+
+
+def _advise_willneed(path: Path) -> None:
+    """Pede ao kernel readahead do arquivo (page cache) antes de ele ser lido; best-effort."""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
 
 
-def run_transform(skip_existing: bool = True) -> None:
+def _transform_workers() -> int:
+    """Processos do transform: TRANSFORM_WORKERS ou metade dos núcleos (folga de RAM: cada um lê um arquivo)."""
+    env = os.environ.get("TRANSFORM_WORKERS", "").strip()
+    if env.isdigit() and int(env) > 0:
+        return int(env)
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+def _init_transform_worker() -> None:
+    """Um thread de Arrow/BLAS por processo: o paralelismo vem dos processos, sem oversubscription."""
+    os.environ["OMP_NUM_THREADS"] = "1"
+    pa.set_cpu_count(1)
+    pa.set_io_thread_count(1)
+
+
+def run_transform(skip_existing: bool = True, workers: int | None = None) -> None:
     """
     Processa Parquets de data/raw/ que ainda não têm correspondente em data/processed/
     (mesma estrutura de partições). Arquivos em raw permanecem (fonte da verdade).
 
     Estratégia: diff raw vs processed — só processa se o arquivo em processed não existir.
     Use skip_existing=False para forçar reprocessamento de todos os arquivos de raw.
+    Arquivos em paralelo (ProcessPoolExecutor): `workers` ou TRANSFORM_WORKERS; 1 = sequencial.
     """
     if not RAW_BASE.is_dir():
         log(QUEM, ONDE_BASE, f"Diretório inexistente: {RAW_BASE}")
         print("ERRO: Diretório data/raw/ inexistente.", flush=True)
         return
 
-    all_raw = sorted(
-        p for p in RAW_BASE.rglob("*.parquet")
-        if not _is_temporary_parquet_artifact(p)
-    )
+    # Uma varredura de cada árvore e diff em memória (sem .exists() por arquivo)
+    raw_rel = _collect_parquets(RAW_BASE)
+    all_raw = [RAW_BASE / rel for rel in sorted(raw_rel)]
     if skip_existing:
-        raw_files = [p for p in all_raw if not _processed_path_for_raw(p).exists()]
+        pending = raw_rel - _collect_parquets(PROCESSED_BASE)
+        raw_files = [RAW_BASE / rel for rel in sorted(pending)]
     else:
         raw_files = all_raw
 
@@ -405,14 +789,40 @@ def run_transform(skip_existing: bool = True) -> None:
     print(f"Iniciando transform: {total} arquivo(s) em data/raw/", flush=True)
     ok = 0
     fail = 0
-    for i, path in enumerate(raw_files, start=1):
-        print(f"  [{i}/{total}] Processando: {path.name}", flush=True)
-        result = transform_single_file(path)
-        if result is not None:
-            ok += 1
-        else:
-            fail += 1
-            print(f"       ⚠ Falha ao processar {path.name}", flush=True)
+    n_workers = min(workers or _transform_workers(), total)
+    if n_workers <= 1:
+        for i, path in enumerate(raw_files, start=1):
+            print(f"  [{i}/{total}] Processando: {path.name}", flush=True)
+            if i < total:
+                # Leitura do próximo arquivo sobreposta à transformação deste
+                _advise_willneed(raw_files[i])
+            result = transform_single_file(path)
+            if result is not None:
+                ok += 1
+            else:
+                fail += 1
+                print(f"       ⚠ Falha ao processar {path.name}", flush=True)
+    else:
+        # Arquivos independentes: um por processo (pandas é single-core); progresso na ordem de conclusão
+        print(f"  {n_workers} processos em paralelo.", flush=True)
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_transform_worker) as ex:
+            futures = {ex.submit(transform_single_file, path): path for path in raw_files}
+            for i, fut in enumerate(as_completed(futures), start=1):
+                path = futures[fut]
+                # Um processo ficou livre: o próximo da fila é raw_files[i + n_workers - 1]
+                if i + n_workers - 1 < total:
+                    _advise_willneed(raw_files[i + n_workers - 1])
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    log(QUEM, str(path), f"ERRO no processo de transform: {e}")
+                    result = None
+                if result is not None:
+                    ok += 1
+                    print(f"  [{i}/{total}] Processado: {path.name}", flush=True)
+                else:
+                    fail += 1
+                    print(f"  [{i}/{total}] ⚠ Falha ao processar {path.name}", flush=True)
 
     n_processed = len(list(PROCESSED_BASE.rglob("*.parquet"))) if PROCESSED_BASE.is_dir() else 0
     log(QUEM, ONDE_BASE, f"Concluído: {ok} processados, {fail} falhas. data/processed/: {n_processed} arquivos .parquet.")
@@ -1,2 +1,6 @@
 # Execução de SQL no DuckDB sobre data/processed/*.parquet.
 # TODO: query(sql: str) -> pd.DataFrame, sem banco externo.
+# Ler com read_parquet(..., hive_partitioning=true): expõe ano/uf/sistema como colunas e
+# filtros nelas podam partições na listagem (sem abrir arquivos fora do filtro).
+# Manter union_by_name=true: o transform fixa o tipo das colunas derivadas, de valor e inteiras
+# conhecidas, mas as demais seguem o tipo de cada arquivo em raw e podem variar entre arquivos.
@@ -0,0 +1,97 @@
+# Testes da cópia nativa DuckDB de data/processed (scripts/build_native.build_native).
+import importlib.util
+import os
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+duckdb = pytest.importorskip("duckdb")
+
+_SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "build_native.py"
+
+
+@pytest.fixture
+def native(tmp_path, monkeypatch):
+    spec = importlib.util.spec_from_file_location("build_native", _SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(module, "PROCESSED", tmp_path / "processed")
+    return module
+
+
+def _write(native, ano: int, uf: str, table: pa.Table) -> Path:
+    path = native.PROCESSED / f"ano={ano}" / f"uf={uf}" / "sistema=SIA" / f"sia_{uf}_{ano}_01.parquet"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(table, path)
+    return path
+
+
+def _rows(db_path: Path, sql: str) -> list[tuple]:
+    con = duckdb.connect(str(db_path), read_only=True)
+    try:
+        return con.execute(sql).fetchall()
+    finally:
+        con.close()
+
+
+def test_later_partition_with_extra_column(native, tmp_path):
+    db = tmp_path / "processed.duckdb"
+    # Layout antigo sem pa_qtdpro; layout novo com a coluna
+    _write(native, 2019, "AC", pa.table({"custo_total": [1.5], "pa_proc_id": ["0301"]}))
+    _write(native, 2020, "AC", pa.table({
+        "custo_total": [2.5], "pa_proc_id": ["0302"], "pa_qtdpro": pa.array([3], pa.uint32()),
+    }))
+    assert native.build_native(db) == (2, 0)
+    assert _rows(db, "SELECT CAST(ano AS VARCHAR), custo_total, pa_qtdpro FROM sia ORDER BY 1") == [
+        ("2019", 1.5, None), ("2020", 2.5, 3),
+    ]
+
+
+def test_incremental_reload_adds_new_columns(native, tmp_path):
+    db = tmp_path / "processed.duckdb"
+    path = _write(native, 2019, "AC", pa.table({"custo_total": [1.5]}))
+    _write(native, 2020, "AC", pa.table({"custo_total": [2.5]}))
+    assert native.build_native(db) == (2, 0)
+    assert native.build_native(db) == (0, 0)  # nada mudou
+
+    # Partição reprocessada com uma coluna nova: só ela é recarregada
+    pq.write_table(pa.table({"custo_total": [7.0], "pa_sexo": ["F"]}), path)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert native.build_native(db) == (1, 0)
+    assert _rows(db, "SELECT CAST(ano AS VARCHAR), custo_total, pa_sexo FROM sia ORDER BY 1") == [
+        ("2019", 7.0, "F"), ("2020", 2.5, None),
+    ]
+
+
+def test_stats_use_native_db_only_while_current(native, tmp_path, monkeypatch):
+    spec = importlib.util.spec_from_file_location("generate_06_2_stats", _SCRIPT.with_name("generate_06_2_stats.py"))
+    stats = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(stats)
+    db = tmp_path / "processed.duckdb"
+    monkeypatch.setattr(stats, "PROCESSED", native.PROCESSED)
+    monkeypatch.setattr(stats, "NATIVE_DB", db)
+
+    def sia(custo: float, mes: int) -> pa.Table:
+        # Colunas lidas por run_sql (DS_COLUMNS["SIA"])
+        return pa.table({
+            "main_icd": ["S72"], "custo_total": [custo], "idade_grupo": ["18-59"], "ano_mes": [202000 + mes],
+            "icd_group": ["Trauma"], "ano_cmpt": pa.array([2020], pa.uint16()),
+            "mes_cmpt": pa.array([mes], pa.uint8()), "sistema": ["SIA"], "pa_proc_id": ["0301"],
+        })
+
+    _write(native, 2019, "AC", sia(1.5, 1))
+    native.build_native(db)
+
+    con = stats.connect()
+    assert stats._create_ds_view(con) == stats.NATIVE_SOURCE
+    con.close()
+
+    # Partição nova sem rodar build_native.py: o banco nativo está defasado
+    _write(native, 2020, "AC", sia(2.5, 2))
+    con = stats.connect()
+    assert stats._create_ds_view(con) == stats.PARQUET_SOURCE
+    assert con.execute("SELECT SUM(custo_total) FROM ds").fetchone() == (4.0,)
+    con.close()
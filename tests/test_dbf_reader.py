@@ -0,0 +1,107 @@
+# Testes do leitor colunar de DBF (ingestion._iter_dbf_columnar) contra o dbfread.
+import datetime as dt
+import struct
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("dbfread")
+
+from data import ingestion
+
+# (nome, tipo, largura, casas decimais)
+FIELDS = [
+    ("DIAG_PRINC", "C", 4, 0),
+    ("OBS", "C", 300, 0),  # > 255 bytes: byte alto da largura no campo de decimais
+    ("IDADE", "N", 3, 0),
+    ("VAL_TOT", "N", 12, 2),
+    ("DT_INTER", "D", 8, 0),
+    ("MORTE", "L", 1, 0),
+]
+
+
+def _field_bytes(value, ftype: str, width: int, dec: int) -> bytes:
+    if value is None:
+        return b" " * width
+    if ftype == "N":
+        text = f"{value:.{dec}f}" if dec else str(value)
+        return text.rjust(width).encode("latin-1")
+    if ftype == "D":
+        return value.strftime("%Y%m%d").encode("latin-1")
+    if ftype == "L":
+        return b"T" if value else b"F"
+    return value.encode("latin-1").ljust(width)
+
+
+def _write_dbf(path, records, *, header_count=None, trailer=b"\x1a"):
+    """DBF mínimo: records = [(flag, [valores])]; header_count sobrescreve o contador do cabeçalho."""
+    record_len = 1 + sum(width for _, _, width, _ in FIELDS)
+    header_len = 32 + 32 * len(FIELDS) + 1
+    n = len(records) if header_count is None else header_count
+    out = bytearray(struct.pack("<BBBBIHH20x", 3, 124, 1, 1, n, header_len, record_len))
+    for name, ftype, width, dec in FIELDS:
+        if ftype == "C":
+            width_lo, dec_byte = width & 0xFF, width >> 8
+        else:
+            width_lo, dec_byte = width, dec
+        out += struct.pack("<11sc4xBB14x", name.encode("latin-1"), ftype.encode(), width_lo, dec_byte)
+    out += b"\x0d"
+    for flag, values in records:
+        out += flag
+        for (_, ftype, width, dec), value in zip(FIELDS, values):
+            out += _field_bytes(value, ftype, width, dec)
+    out += trailer
+    path.write_bytes(bytes(out))
+
+
+RECORDS = [
+    (b" ", ["S72", "fratura " * 30, 45, 1234.56, dt.date(2020, 1, 2), False]),
+    (b" ", ["E11", "", 7, None, None, True]),
+    (b"*", ["I70", "excluído", 80, 10.0, dt.date(2020, 3, 4), False]),
+    (b" ", ["", "ç" * 10, None, 0.5, dt.date(2019, 12, 31), None]),
+]
+
+
+def _values(s: pd.Series) -> list:
+    """Valores da coluna com nulo único (None): NaN do leitor colunar e None do dbfread se equivalem."""
+    return [None if v is None or (isinstance(v, float) and pd.isna(v)) else v for v in s.tolist()]
+
+
+def _frames(path, chunk_size):
+    layout = ingestion._dbf_layout(path)
+    assert layout is not None
+    columnar = pd.concat(list(ingestion._iter_dbf_columnar(path, layout, chunk_size)), ignore_index=True)
+    records = pd.concat(list(ingestion._iter_dbf_records(path, chunk_size)), ignore_index=True)
+    return columnar, records
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 100])
+def test_columnar_matches_dbfread(tmp_path, chunk_size):
+    path = tmp_path / "RDAC2001.dbf"
+    _write_dbf(path, RECORDS)
+    columnar, records = _frames(path, chunk_size)
+    assert list(columnar.columns) == list(records.columns)
+    assert len(columnar) == 3  # registro excluído fica de fora
+    for col in records.columns:
+        assert _values(columnar[col]) == _values(records[col]), col
+    assert columnar["obs"].iloc[0] == ("fratura " * 30).rstrip()
+
+
+def test_layout_wide_char_field(tmp_path):
+    path = tmp_path / "wide.dbf"
+    _write_dbf(path, RECORDS)
+    _, _, record_len, fields = ingestion._dbf_layout(path)
+    by_name = {name: (ftype, width, dec) for name, ftype, _offset, width, dec in fields}
+    assert by_name["OBS"] == ("C", 300, 0)
+    assert by_name["VAL_TOT"] == ("N", 12, 2)
+    assert record_len == 1 + sum(width for _, width, _ in by_name.values())
+
+
+@pytest.mark.parametrize("header_count", [1, 50])
+def test_record_count_follows_file_data(tmp_path, header_count):
+    # Contador do cabeçalho errado e lixo após o 0x1A: vale o que está no arquivo, como no dbfread
+    path = tmp_path / "count.dbf"
+    _write_dbf(path, RECORDS, header_count=header_count, trailer=b"\x1a" + b" " * 400)
+    columnar, records = _frames(path, 2)
+    assert len(records) == 3
+    assert _values(columnar["diag_princ"]) == _values(records["diag_princ"])
@@ -0,0 +1,76 @@
+# Testes do catálogo persistente de contagens por arquivo (scripts/generate_06_2_stats.row_counts_cached).
+import importlib.util
+import os
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+pytest.importorskip("duckdb")
+
+_SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "generate_06_2_stats.py"
+
+
+@pytest.fixture
+def stats(tmp_path, monkeypatch):
+    spec = importlib.util.spec_from_file_location("generate_06_2_stats", _SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(module, "STATS_CACHE_DB", tmp_path / ".stats_cache.duckdb")
+    reads: list[list[str]] = []
+    read_row_counts = module.read_row_counts
+
+    def counting(con, files):
+        reads.append(sorted(files))
+        return read_row_counts(con, files)
+
+    monkeypatch.setattr(module, "read_row_counts", counting)
+    module.reads = reads
+    return module
+
+
+def _write(path: Path, n: int) -> str:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.table({"x": pa.array(range(n), pa.int64())}), path)
+    return str(path)
+
+
+def test_footer_read_only_for_new_or_changed_files(stats, tmp_path):
+    base = tmp_path / "processed"
+    a = _write(base / "ano=2020" / "uf=AC" / "sistema=SIA" / "a.parquet", 3)
+    b = _write(base / "ano=2020" / "uf=AC" / "sistema=SIH" / "b.parquet", 2)
+
+    assert stats.row_counts_cached(stats._list_parquet(base)) == {a: 3, b: 2}
+    assert stats.reads == [[a, b]]
+
+    # Nada mudou: tudo sai do catálogo
+    assert stats.row_counts_cached(stats._list_parquet(base)) == {a: 3, b: 2}
+    assert stats.reads == [[a, b]]
+
+    # Só o mtime muda: o footer de a é relido
+    st = os.stat(a)
+    os.utime(a, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert stats.row_counts_cached(stats._list_parquet(base)) == {a: 3, b: 2}
+    assert stats.reads[-1] == [a]
+
+    # Arquivo reescrito (outro mtime e conteúdo): contagem nova
+    _write(Path(a), 7)
+    os.utime(a, ns=(st.st_atime_ns, st.st_mtime_ns + 2_000_000_000))
+    assert stats.row_counts_cached(stats._list_parquet(base)) == {a: 7, b: 2}
+    assert stats.reads[-1] == [a]
+
+
+def test_removed_files_leave_the_catalog(stats, tmp_path):
+    base = tmp_path / "processed"
+    a = _write(base / "ano=2020" / "uf=AC" / "sistema=SIA" / "a.parquet", 3)
+    b = _write(base / "ano=2021" / "uf=AC" / "sistema=SIA" / "b.parquet", 4)
+    assert stats.row_counts_cached(stats._list_parquet(base)) == {a: 3, b: 4}
+
+    os.remove(b)
+    assert stats.row_counts_cached(stats._list_parquet(base)) == {a: 3}
+    con = stats.connect(stats.STATS_CACHE_DB)
+    try:
+        assert con.execute("SELECT path FROM file_row_counts").fetchall() == [(a,)]
+    finally:
+        con.close()
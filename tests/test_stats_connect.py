@@ -0,0 +1,58 @@
+# Testes das configurações da conexão DuckDB do script de estatísticas (scripts/generate_06_2_stats.connect).
+import importlib.util
+import os
+from pathlib import Path
+
+import pytest
+
+duckdb = pytest.importorskip("duckdb")
+
+_SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "generate_06_2_stats.py"
+_SETTINGS = ("threads", "enable_object_cache", "preserve_insertion_order", "memory_limit")
+
+
+@pytest.fixture
+def stats():
+    spec = importlib.util.spec_from_file_location("generate_06_2_stats", _SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _settings(con) -> dict:
+    sql = "SELECT " + ", ".join(f"current_setting('{name}')" for name in _SETTINGS)
+    return dict(zip(_SETTINGS, con.execute(sql).fetchone()))
+
+
+def _memory_limit(value: str | None) -> str:
+    """memory_limit como o DuckDB o exibe (ex.: '1GB' → '953.6 MiB'); None = padrão do DuckDB."""
+    con = duckdb.connect()
+    try:
+        if value is not None:
+            con.execute(f"SET memory_limit = '{value}'")
+        return _settings(con)["memory_limit"]
+    finally:
+        con.close()
+
+
+def test_connect_settings(stats, monkeypatch):
+    monkeypatch.delenv("DUCKDB_MEMORY_LIMIT", raising=False)
+    con = stats.connect()
+    try:
+        assert _settings(con) == {
+            "threads": os.cpu_count() or 1,
+            "enable_object_cache": True,
+            "preserve_insertion_order": False,
+            "memory_limit": _memory_limit(None),  # sem a variável, o limite padrão fica intacto
+        }
+    finally:
+        con.close()
+
+
+def test_connect_memory_limit_from_env(stats, monkeypatch):
+    monkeypatch.setenv("DUCKDB_MEMORY_LIMIT", "1GB")
+    con = stats.connect()
+    try:
+        assert _settings(con)["memory_limit"] == _memory_limit("1GB") != _memory_limit(None)
+    finally:
+        con.close()
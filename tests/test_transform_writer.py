@@ -0,0 +1,90 @@
+# Testes da gravação em lotes de data/processed (transform._write_batches e transform_single_file).
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from data import transform
+
+
+def _batches(*tables):
+    yield from tables
+
+
+def test_multi_batch_write_keeps_first_schema(tmp_path, monkeypatch):
+    monkeypatch.setattr(transform, "ROW_GROUP_ROWS", 3)
+    out = tmp_path / "out.parquet.tmp"
+    n = transform._write_batches(_batches(
+        pa.table({"custo_total": pa.array([1.5, 2.0]), "obs": pa.nulls(2)}),
+        # int64 numa coluna double e texto numa coluna só-nula no primeiro lote: convertidos
+        pa.table({"custo_total": pa.array([3, 4], pa.int64()), "obs": pa.array(["a", None])}),
+        # coluna ausente vira nula
+        pa.table({"custo_total": pa.array([5.25])}),
+    ), out)
+    assert n == 3
+    pf = pq.ParquetFile(out)
+    assert pf.schema_arrow.field("custo_total").type == pa.float64()
+    assert pf.schema_arrow.field("obs").type == pa.string()
+    rg_rows = [pf.metadata.row_group(i).num_rows for i in range(pf.metadata.num_row_groups)]
+    assert sum(rg_rows) == 5 and max(rg_rows) <= 3  # row groups de até ROW_GROUP_ROWS linhas
+    table = pf.read()
+    assert table.column("custo_total").to_pylist() == [1.5, 2.0, 3.0, 4.0, 5.25]
+    assert table.column("obs").to_pylist() == [None, None, "a", None, None]
+
+
+@pytest.mark.parametrize("second", [
+    pa.table({"ano_cmpt": pa.array([2020.5])}),  # double não inteiro numa coluna uint16
+    pa.table({"ano_cmpt": pa.array([2020], pa.uint16()), "extra": pa.array([1])}),  # coluna fora do schema
+])
+def test_type_conflict_fails_instead_of_rewriting(tmp_path, second):
+    out = tmp_path / "out.parquet.tmp"
+    with pytest.raises(ValueError):
+        transform._write_batches(_batches(pa.table({"ano_cmpt": pa.array([2020], pa.uint16())}), second), out)
+
+
+def _write_raw(tmp_path, table):
+    raw = tmp_path / "raw" / "ano=2022" / "uf=AC" / "sistema=SIA" / "sia_AC_2022_01.parquet"
+    raw.parent.mkdir(parents=True)
+    pq.write_table(table, raw)
+    return raw
+
+
+def test_transform_file_schema_is_stable_across_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(transform, "PROCESSED_BASE", tmp_path / "processed")
+    monkeypatch.setattr(transform, "TRANSFORM_BATCH_ROWS", 2)
+    logged = []
+    monkeypatch.setattr(transform, "log", lambda quem, onde, msg: logged.append((onde, msg)))
+    # 1º lote: valores inteiros e sem nulos; 2º: centavos, nulos e ano fora da faixa de uint16
+    raw = _write_raw(tmp_path, pa.table({
+        "pa_valpro": pa.array(["10", "20", "30.75", None]),
+        "pa_qtdpro": pa.array([1, 2, None, 4], pa.int64()),
+        "ano_cmpt": pa.array([2022, 2022, 2022, 99999], pa.int64()),
+        "mes_cmpt": pa.array([1, 1, 1, 1], pa.int64()),
+        "pa_cidpri": pa.array(["S72", "E11", None, "I70"]),
+        "pa_idade": pa.array([10, 70, None, 30], pa.int64()),
+    }))
+    dest = transform.transform_single_file(raw)
+    assert dest is not None and dest.is_file()
+    table = pq.read_table(dest)
+    assert table.schema.field("custo_total").type == pa.float64()
+    assert table.schema.field("ano_cmpt").type == pa.uint16()
+    assert table.schema.field("mes_cmpt").type == pa.uint8()
+    assert table.column("custo_total").to_pylist() == [10.0, 20.0, 30.75, None]
+    assert table.column("ano_cmpt").to_pylist() == [2022, 2022, 2022, None]
+    # O ano anulado não some em silêncio: fica no log do arquivo
+    assert logged == [(str(raw), "AVISO: valores fora da faixa ou não inteiros gravados como nulo: ano_cmpt=1")]
+    assert not dest.with_name(dest.name + ".tmp").exists()
+
+
+def test_empty_raw_file_gets_processed_schema(tmp_path, monkeypatch):
+    monkeypatch.setattr(transform, "PROCESSED_BASE", tmp_path / "processed")
+    raw = _write_raw(tmp_path, pa.table({
+        "pa_valpro": pa.array([], pa.float64()),
+        "ano_cmpt": pa.array([], pa.int64()),
+        "mes_cmpt": pa.array([], pa.int64()),
+    }))
+    dest = transform.transform_single_file(raw)
+    schema = pq.read_schema(dest)
+    assert pq.read_metadata(dest).num_rows == 0
+    assert schema.field("custo_total").type == pa.float64()
+    assert schema.field("ano_cmpt").type == pa.uint16()
+    assert "idade_grupo" in schema.names